@@ -1,20 +1,46 @@
 #!/usr/bin/env python3
 """Interactive Ball Annotator - Mouse tracking recording mode"""
 
+import argparse
+import bisect
 import cv2
 import json
 import os
 import sys
+import time
 from datetime import datetime
 from pathlib import Path
 
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from motion_detector.pre_annotate import PreAnnotator
+from utils.annotation_io import save_npy
+from utils.annotation_journal import AnnotationJournal
+from utils.frame_cache import DEFAULT_CACHE_MB, FrameCache
+from utils.frame_prefetch import DEFAULT_PREFETCH_FRAMES, FramePrefetcher
+from utils.interpolation import (DEFAULT_INTERPOLATION, INTERPOLATION_METHODS, SEARCH_RADIUS, TEMPLATE_SIZE,
+                                 cut_template, interpolate_positions, refine_position)
+from utils.proxy import DEFAULT_PROXY_HEIGHT, build_proxy
+from utils.video_index import FrameSeeker, load_keyframe_index
+
 DEFAULT_OUTPUT_DIR = "annotations"
 DEFAULT_BBOX_SIZE = 20
 DEFAULT_SCALE = 30
 DEFAULT_MODEL_PATH = "models/yolov8n.pt"
+BACKFILL_FRAMES = 30  # frames decoded ahead of a backward seek so stepping further back is instant
+COMPACT_MIN_RECORDS = 2000  # journal records before the COCO file is rewritten in the background...
+COMPACT_RATIO = 0.5  # ...and at least this fraction of the annotation count, so rewrites stay linear overall
+DEFAULT_KEYFRAME_STEP = 10  # frames skipped forward after each keyframe click
+MAX_INTERP_GAP = 150  # keyframes further apart are not interpolated (ball likely out of play)
+CANDIDATE_POLL_INTERVAL = 0.5  # seconds between reads of the pre-annotation stream
 
 class BallAnnotator:
-    def __init__(self, video_path, output_dir=DEFAULT_OUTPUT_DIR, bbox_size=DEFAULT_BBOX_SIZE, scale=DEFAULT_SCALE):
+    def __init__(self, video_path, output_dir=DEFAULT_OUTPUT_DIR, bbox_size=DEFAULT_BBOX_SIZE, scale=DEFAULT_SCALE,
+                 cache_mb=DEFAULT_CACHE_MB, cache_downscale=False, prefetch_frames=DEFAULT_PREFETCH_FRAMES,
+                 proxy_height=None, keyframe_step=DEFAULT_KEYFRAME_STEP, interpolation=DEFAULT_INTERPOLATION,
+                 refine=False, pre_annotate_model=None, binary=False):
         self.video_path = video_path
         self.output_dir = output_dir
         self.video_name = Path(video_path).stem
@@ -31,6 +57,19 @@ class BallAnnotator:
         self.width = int(self.cap.get(cv2.CAP_PROP_FRAME_WIDTH))
         self.height = int(self.cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
 
+        # Frames are decoded from source_path: the video itself, or its proxy.
+        # Display and annotations stay in original width/height coordinates.
+        self.source_path = video_path
+        if proxy_height is not None and proxy_height < self.height:
+            self.source_path = build_proxy(video_path, proxy_height)
+            self.cap.release()
+            self.cap = cv2.VideoCapture(self.source_path)
+            proxy_frames = int(self.cap.get(cv2.CAP_PROP_FRAME_COUNT))
+            if proxy_frames != self.total_frames:
+                print(f"⚠ Proxy has {proxy_frames} frames, original {self.total_frames}")
+        self.source_width = int(self.cap.get(cv2.CAP_PROP_FRAME_WIDTH))
+        self.source_height = int(self.cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
+
         self.coco_data = {
             "info": {
                 "description": f"Ball tracking annotations for {self.video_name}",
@@ -48,17 +87,55 @@ class BallAnnotator:
             },
             "annotations": []
         }
+        # frame_id -> annotation; coco_data["annotations"] is rebuilt from it on save
+        self.annotations = {}
+        self.output_file = os.path.join(output_dir, f"{self.video_name}_coco.json")
+        # Optional memory-mappable copy (see utils/annotation_io.py), written with every save
+        self.binary_file = os.path.join(output_dir, f"{self.video_name}_coco.npy") if binary else None
+        # Every edit is journaled right away; the COCO file is rewritten in the background
+        self.journal = AnnotationJournal(os.path.join(output_dir, f"{self.video_name}_coco.journal.jsonl"))
 
         self.current_frame_idx = 0
         self.current_frame = None
+        self.current_display = None  # current frame already resized for display (playback)
+        self.seeker = FrameSeeker(self.cap, load_keyframe_index(self.source_path))
+        self.scale_percent = scale
+        self.cache_downscale = cache_downscale
+        self.frame_cache = FrameCache(cache_mb, scale=self.cache_scale() if cache_downscale else None)
+        self.backfill = min(BACKFILL_FRAMES,
+                            self.frame_cache.capacity(self.source_width * self.source_height * 3) // 2)
         self.is_recording = False
         self.is_playing = False
         self.playback_speed = 1
+        self.prefetch_frames = prefetch_frames
+        self.prefetcher = None
+        self.play_clock = None  # (wall time, frame index) playback is timed from
+        self.play_stats = {'shown': 0, 'dropped': 0}
+        self.dropped_pending = []  # frames dropped while recording, annotated on the next shown one
+        self.last_recorded = None
+
+        # Keyframe mode: click the ball every `keyframe_step` frames, the rest is interpolated
+        self.keyframe_mode = False
+        self.keyframe_step = keyframe_step
+        self.interpolation = interpolation
+        self.refine = refine
+        self.key_frames = []  # sorted frame ids of manual (not interpolated) annotations
+        self.pending_click = None
+        self.session_start = time.perf_counter()
+        self.labelled = set()  # frames annotated this session
+        self.keyframes_clicked = 0
+
+        # Pre-annotation: detector candidates (original video, not the proxy) to accept/reject
+        self.pre_annotator = None
+        if pre_annotate_model is not None:
+            self.pre_annotator = PreAnnotator(
+                video_path, os.path.join(output_dir, f"{self.video_name}_candidates.jsonl"), pre_annotate_model)
+        self.rejected = set()  # frame ids whose candidate was rejected
+        self.last_poll = 0.0
 
         self.mouse_x = 0
         self.mouse_y = 0
 
-        self.scale_percent = scale
         self.display_frame = None
         self.window_name = f"Ball Annotator - {self.video_name}"
         self.annotation_id = 1
@@ -69,10 +146,20 @@ class BallAnnotator:
         print(f"Video: {self.video_name}")
         print(f"Frames: {self.total_frames} | FPS: {self.fps}")
         print(f"Resolution: {self.width}x{self.height}")
+        if self.source_path != video_path:
+            print(f"Proxy: {self.source_width}x{self.source_height} ({self.source_path})")
+        print(f"Frame cache: {cache_mb} MB{' (display size)' if cache_downscale else ''}")
+        if self.seeker.keyframes:
+            print(f"Keyframes: {len(self.seeker.keyframes)} | max GOP {self.seeker.max_gop()} frames")
         print(f"\nCONTROLS:")
         print(f"  'r': Start/Stop RECORDING (follow ball with mouse)")
+        print(f"  'k': Keyframe mode (click the ball, jump {keyframe_step} frames, in-between is interpolated)")
+        print(f"  'i': Re-interpolate all keyframe gaps ({interpolation}{', template refined' if refine else ''})")
         print(f"  SPACE: Play/Pause")
         print(f"  'n'/'p': Next/Previous frame")
+        if self.pre_annotator is not None:
+            print(f"  'a'/'x': Accept/Reject the detector candidate and go to the next frame")
+        print(f"  'd': Delete annotation on current frame")
         print(f"  'g': Go to frame")
         print(f"  's': Save")
         print(f"  'q': Quit and save")
@@ -84,8 +171,10 @@ class BallAnnotator:
         scale_factor = self.scale_percent / 100
         self.mouse_x = int(x / scale_factor)
         self.mouse_y = int(y / scale_factor)
+        if event == cv2.EVENT_LBUTTONDOWN and self.keyframe_mode:
+            self.pending_click = (self.mouse_x, self.mouse_y)
 
-    def add_annotation(self, frame_idx, x, y):
+    def add_annotation(self, frame_idx, x, y, interpolated=False, source=None):
         x = max(0, min(x, self.width))
         y = max(0, min(y, self.height))
 
@@ -95,32 +184,228 @@ class BallAnnotator:
             "frame_id": frame_idx,
             "center": [x, y]
         }
-
-        self.coco_data["annotations"] = [
-            ann for ann in self.coco_data["annotations"]
-            if ann["frame_id"] != frame_idx
-        ]
-
-        self.coco_data["annotations"].append(annotation)
+        if source is not None:
+            annotation["source"] = source
+        i = bisect.bisect_left(self.key_frames, frame_idx)
+        is_key = i < len(self.key_frames) and self.key_frames[i] == frame_idx
+        if interpolated:
+            annotation["interpolated"] = True
+            if is_key:  # e.g. a dropped playback frame re-recorded over an earlier click
+                self.key_frames.pop(i)
+        elif not is_key:
+            self.key_frames.insert(i, frame_idx)
+
+        self.annotations[frame_idx] = annotation
+        self.labelled.add(frame_idx)
         self.annotation_id += 1
+        self.journal.upsert(annotation)
+        self.maybe_compact()
         return annotation
 
+    def delete_annotation(self, frame_idx):
+        """Remove the annotation on a frame; returns it, or None if there was none"""
+        ann = self.annotations.pop(frame_idx, None)
+        if ann is None:
+            return None
+        i = bisect.bisect_left(self.key_frames, frame_idx)
+        if i < len(self.key_frames) and self.key_frames[i] == frame_idx:
+            self.key_frames.pop(i)
+        self.labelled.discard(frame_idx)
+        self.journal.delete(frame_idx)
+        self.maybe_compact()
+        return ann
+
+    def candidate(self, frame_idx):
+        """Detector candidate (x, y, confidence) for a frame, unless rejected"""
+        if self.pre_annotator is None or frame_idx in self.rejected:
+            return None
+        return self.pre_annotator.candidates.get(frame_idx)
+
+    def poll_candidates(self):
+        now = time.perf_counter()
+        if self.pre_annotator is None or now - self.last_poll < CANDIDATE_POLL_INTERVAL:
+            return
+        self.last_poll = now
+        self.pre_annotator.poll()
+        if self.pre_annotator.failed():
+            print(f"⚠ Pre-annotation failed, see {self.pre_annotator.log_path}")
+            self.pre_annotator.close()
+
+    def accept_candidate(self):
+        candidate = self.candidate(self.current_frame_idx)
+        if candidate is None:
+            return False
+        frame_idx = self.current_frame_idx
+        self.add_annotation(frame_idx, int(round(candidate[0])), int(round(candidate[1])), source="detector")
+        if self.keyframe_mode:
+            self.interpolate_around(frame_idx)
+        self.next_frame()
+        return True
+
+    def reject_candidate(self):
+        if self.candidate(self.current_frame_idx) is None:
+            return False
+        self.rejected.add(self.current_frame_idx)
+        self.journal.reject(self.current_frame_idx)
+        self.maybe_compact()
+        self.next_frame()
+        return True
+
+    def add_keyframe(self, x, y):
+        """Annotate the current frame at a click, fill the gaps on both sides
+        of it and jump `keyframe_step` frames ahead"""
+        frame_idx = self.current_frame_idx
+        self.add_annotation(frame_idx, x, y)
+        self.keyframes_clicked += 1
+        filled = self.interpolate_around(frame_idx)
+        print(f"✓ Keyframe {frame_idx} ({x}, {y}) | +{filled} interpolated | "
+              f"{self.frames_per_minute():.0f} frames/min")
+        if self.keyframe_step:
+            self.go_to_frame(min(frame_idx + self.keyframe_step, self.total_frames - 1))
+
+    def interpolate_around(self, frame_idx):
+        """Refill the keyframe gaps touching `frame_idx` (after adding or
+        deleting a keyframe there)"""
+        lo = bisect.bisect_left(self.key_frames, frame_idx)
+        hi = bisect.bisect_right(self.key_frames, frame_idx)
+        prev_key = self.key_frames[lo - 1] if lo > 0 else None
+        next_key = self.key_frames[hi] if hi < len(self.key_frames) else None
+
+        if lo < hi:
+            gaps = [(prev_key, frame_idx), (frame_idx, next_key)]
+        else:
+            gaps = [(prev_key, next_key)]
+            # A deleted end keyframe leaves no gap to refill; drop what was interpolated towards it
+            if prev_key is None and next_key is not None:
+                self.clear_interpolated(frame_idx, next_key)
+            elif next_key is None and prev_key is not None:
+                self.clear_interpolated(prev_key, frame_idx)
+        return self.interpolate_gaps([(f0, f1) for f0, f1 in gaps if f0 is not None and f1 is not None])
+
+    def clear_interpolated(self, f0, f1):
+        """Delete the interpolated annotations strictly between two frames"""
+        for frame_idx in range(f0 + 1, f1):
+            ann = self.annotations.get(frame_idx)
+            if ann is not None and ann.get("interpolated"):
+                self.delete_annotation(frame_idx)
+
+    def interpolate_gaps(self, gaps):
+        """Fill the frames strictly inside each (f0, f1) pair of neighbouring
+        keyframes (sorted) with interpolated annotations.
+
+        All gaps are interpolated in one vectorized call. Gaps longer than
+        MAX_INTERP_GAP are left empty, and stale interpolated frames in them
+        are removed. Returns the number of frames filled.
+        """
+        fill = []
+        for f0, f1 in gaps:
+            if f1 - f0 <= MAX_INTERP_GAP:
+                fill.append((f0, f1))
+            else:
+                self.clear_interpolated(f0, f1)
+
+        fill = [(f0, f1) for f0, f1 in fill if f1 - f0 > 1]
+        if not fill:
+            return 0
+
+        # The spline tangents need one more keyframe on each side
+        lo = max(0, bisect.bisect_left(self.key_frames, fill[0][0]) - 1)
+        hi = bisect.bisect_right(self.key_frames, fill[-1][1]) + 1
+        keys = self.key_frames[lo:hi]
+        points = [self.annotations[frame_idx]["center"] for frame_idx in keys]
+
+        query = np.concatenate([np.arange(f0 + 1, f1) for f0, f1 in fill])
+        positions = interpolate_positions(keys, points, query, self.interpolation)
+        if self.refine:
+            positions = self.refine_positions(keys, points, query, positions)
+
+        for frame_idx, (x, y) in zip(query.tolist(), np.rint(positions).astype(int).tolist()):
+            self.add_annotation(frame_idx, x, y, interpolated=True)
+        return len(query)
+
+    def interpolate_all(self):
+        keys = np.asarray(self.key_frames)
+        gaps = [(int(f0), int(f1)) for f0, f1 in zip(keys[:-1], keys[1:]) if f1 - f0 > 1]
+        return self.interpolate_gaps(gaps)
+
+    def refine_positions(self, keys, points, query, positions):
+        """Move interpolated points onto the best match of the ball as seen on
+        the nearest keyframe (points without a good match stay as they are).
+
+        Frames come from the frame cache / decoder, so they may be proxy or
+        display sized: coordinates are scaled by the decoded frame width.
+        """
+        keys = np.asarray(keys)
+        nearest = np.clip(np.searchsorted(keys, query), 1, len(keys) - 1)
+        nearest -= (query - keys[nearest - 1]) <= (keys[nearest] - query)
+
+        templates = {}
+        for k in np.unique(nearest).tolist():
+            frame = self.read_frame(int(keys[k]))
+            if frame is None:
+                continue
+            s = frame.shape[1] / self.width
+            templates[k] = cut_template(frame, np.asarray(points[k]) * s, max(4, int(TEMPLATE_SIZE * s)))
+
+        refined = positions.copy()
+        moved = 0
+        for i, frame_idx in enumerate(query.tolist()):
+            template = templates.get(int(nearest[i]))
+            frame = self.read_frame(frame_idx) if template is not None else None
+            if frame is None:
+                continue
+            s = frame.shape[1] / self.width
+            match = refine_position(frame, template, positions[i] * s, max(2, int(SEARCH_RADIUS * s)))
+            if match is not None:
+                refined[i] = np.asarray(match) / s
+                moved += 1
+        print(f"  Template refinement: {moved}/{len(query)} points matched")
+        return refined
+
+    def frames_per_minute(self):
+        return len(self.labelled) / max((time.perf_counter() - self.session_start) / 60, 1e-9)
+
+    def session_stats(self):
+        return {
+            "frames_labelled": len(self.labelled),
+            "keyframes_clicked": self.keyframes_clicked,
+            "minutes": round((time.perf_counter() - self.session_start) / 60, 2),
+            "frames_per_minute": round(self.frames_per_minute(), 1)
+        }
+
+    def cache_scale(self):
+        """Display size relative to the decoded (possibly proxy) frames"""
+        return self.scale_percent / 100 * self.width / self.source_width
+
+    def display_size(self):
+        scale_factor = self.scale_percent / 100
+        return int(self.width * scale_factor), int(self.height * scale_factor)
+
     def draw_display(self):
         if self.current_frame is None:
             return
 
         scale_factor = self.scale_percent / 100
-        width = int(self.current_frame.shape[1] * scale_factor)
-        height = int(self.current_frame.shape[0] * scale_factor)
-        display = cv2.resize(self.current_frame, (width, height))
-
-        for ann in self.coco_data["annotations"]:
-            if ann["frame_id"] == self.current_frame_idx:
-                cx, cy = ann["center"]
-                x = int(cx * scale_factor)
-                y = int(cy * scale_factor)
-                cv2.circle(display, (x, y), 8, (0, 255, 0), 2)
-                cv2.circle(display, (x, y), 2, (0, 255, 0), -1)
+        width, height = self.display_size()
+        if self.current_display is not None and self.current_display.shape[:2] == (height, width):
+            display = self.current_display.copy()
+        else:
+            display = cv2.resize(self.current_frame, (width, height))
+
+        ann = self.annotations.get(self.current_frame_idx)
+        if ann is not None:
+            cx, cy = ann["center"]
+            x = int(cx * scale_factor)
+            y = int(cy * scale_factor)
+            ann_color = (0, 255, 255) if ann.get("interpolated") else (0, 255, 0)
+            cv2.circle(display, (x, y), 8, ann_color, 2)
+            cv2.circle(display, (x, y), 2, ann_color, -1)
+
+        candidate = self.candidate(self.current_frame_idx)
+        if candidate is not None:
+            x = int(candidate[0] * scale_factor)
+            y = int(candidate[1] * scale_factor)
+            cv2.drawMarker(display, (x, y), (255, 0, 255), cv2.MARKER_DIAMOND, 18, 2)
 
         if self.is_recording:
             mouse_x_scaled = int(self.mouse_x * scale_factor)
@@ -132,7 +417,7 @@ class BallAnnotator:
 
         info_y = 30
         overlay = display.copy()
-        cv2.rectangle(overlay, (0, 0), (500, 200), (0, 0, 0), -1)
+        cv2.rectangle(overlay, (0, 0), (500, 260), (0, 0, 0), -1)
         cv2.addWeighted(overlay, 0.6, display, 0.4, 0, display)
 
         cv2.putText(display, f"Frame: {self.current_frame_idx}/{self.total_frames}",
@@ -143,6 +428,8 @@ class BallAnnotator:
             status, color = "RECORDING", (0, 0, 255)
         elif self.is_playing:
             status, color = "PLAYING", (0, 255, 255)
+        elif self.keyframe_mode:
+            status, color = "KEYFRAME", (255, 200, 0)
         else:
             status, color = "PAUSED", (200, 200, 200)
 
@@ -150,7 +437,7 @@ class BallAnnotator:
                    cv2.FONT_HERSHEY_SIMPLEX, 0.7, color, 2)
         info_y += 30
 
-        cv2.putText(display, f"Annotations: {len(self.coco_data['annotations'])}",
+        cv2.putText(display, f"Annotations: {len(self.annotations)}",
                    (10, info_y), cv2.FONT_HERSHEY_SIMPLEX, 0.7, (0, 255, 0), 2)
         info_y += 30
 
@@ -158,7 +445,24 @@ class BallAnnotator:
                    (10, info_y), cv2.FONT_HERSHEY_SIMPLEX, 0.7, (255, 255, 255), 2)
         info_y += 30
 
-        if not self.is_recording:
+        cv2.putText(display, f"Labelled: {len(self.labelled)} ({self.frames_per_minute():.0f}/min)",
+                   (10, info_y), cv2.FONT_HERSHEY_SIMPLEX, 0.7, (255, 255, 255), 2)
+        info_y += 30
+
+        if self.pre_annotator is not None:
+            done = self.pre_annotator.progress
+            text = f"Candidates: {len(self.pre_annotator.candidates)}"
+            if self.pre_annotator.running():
+                text += f" (detecting {done}/{self.total_frames})"
+            if candidate is not None:
+                text += f" | {candidate[2]:.2f} a=accept x=reject"
+            cv2.putText(display, text, (10, info_y), cv2.FONT_HERSHEY_SIMPLEX, 0.5, (255, 0, 255), 1)
+            info_y += 30
+
+        if self.keyframe_mode and not self.is_recording:
+            cv2.putText(display, f"Click the ball | next keyframe +{self.keyframe_step}",
+                       (10, info_y), cv2.FONT_HERSHEY_SIMPLEX, 0.5, (255, 200, 0), 1)
+        elif not self.is_recording:
             cv2.putText(display, "Press 'r' to record | SPACE=play",
                        (10, info_y), cv2.FONT_HERSHEY_SIMPLEX, 0.5, (200, 200, 200), 1)
         else:
@@ -167,68 +471,221 @@ class BallAnnotator:
 
         cv2.imshow(self.window_name, display)
 
-    def save_to_file(self):
-        output_file = os.path.join(self.output_dir, f"{self.video_name}_coco.json")
-        self.coco_data["annotations"].sort(key=lambda x: x["frame_id"])
+    def snapshot_coco(self):
+        """COCO document of the current annotations (annotation dicts are never
+        mutated once stored, so the snapshot can be written from another thread)"""
+        self.coco_data["annotations"] = [self.annotations[frame_id] for frame_id in sorted(self.annotations)]
         self.coco_data["info"]["last_modified"] = datetime.now().isoformat()
         self.coco_data["info"]["total_annotations"] = len(self.coco_data["annotations"])
+        if self.rejected:
+            self.coco_data["info"]["rejected_candidates"] = sorted(self.rejected)
+        return dict(self.coco_data, info=dict(self.coco_data["info"]))
+
+    def write_coco(self, coco, indent=None):
+        partial = self.output_file + ".partial"
+        with open(partial, 'w') as f:
+            json.dump(coco, f, indent=indent)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(partial, self.output_file)
+        if self.binary_file is not None:
+            save_npy(coco, self.binary_file)
+
+    def maybe_compact(self):
+        if self.journal.records >= max(COMPACT_MIN_RECORDS, COMPACT_RATIO * len(self.annotations)):
+            self.compact()
+
+    def compact(self, indent=None):
+        """Rewrite the COCO file in the journal thread and start a fresh journal.
+        Automatic rewrites skip indentation (json's C encoder only runs without it)."""
+        coco = self.snapshot_coco()
+        self.journal.compact(lambda: self.write_coco(coco, indent))
 
-        with open(output_file, 'w') as f:
-            json.dump(self.coco_data, f, indent=2)
+    def save_to_file(self):
+        """Write the COCO file now (used on quit; 's' compacts in the background)"""
+        self.coco_data["info"]["last_session"] = self.session_stats()
+        if self.journal.running():
+            self.compact(indent=2)
+            self.journal.flush()
+        else:
+            self.write_coco(self.snapshot_coco(), indent=2)
+        output_file = self.output_file
 
         print(f"\n{'='*70}")
         print(f"✓ Saved: {output_file}")
+        if self.binary_file is not None:
+            print(f"✓ Saved: {self.binary_file}")
         print(f"  Annotations: {len(self.coco_data['annotations'])}")
         print(f"  Resolution: {self.width}x{self.height}")
+        stats = self.coco_data["info"]["last_session"]
+        print(f"  Throughput: {stats['frames_labelled']} frames in {stats['minutes']:.1f} min "
+              f"({stats['frames_per_minute']:.0f} frames/min, {stats['keyframes_clicked']} keyframes clicked)")
         print(f"{'='*70}\n")
         return output_file
 
     def load_existing_annotations(self):
-        annotation_file = os.path.join(self.output_dir, f"{self.video_name}_coco.json")
+        """Load the COCO file, then replay the journal of edits made after it
+        was last written (e.g. before a crash)"""
+        annotation_file = self.output_file
+        loaded_any = False
 
         if os.path.exists(annotation_file):
             try:
                 with open(annotation_file, 'r') as f:
                     loaded = json.load(f)
-                    self.coco_data["annotations"] = loaded.get("annotations", [])
-                    if self.coco_data["annotations"]:
-                        self.annotation_id = max(ann["id"] for ann in self.coco_data["annotations"]) + 1
-                print(f"✓ Loaded {len(self.coco_data['annotations'])} annotations")
-                return True
+                    self.annotations = {ann["frame_id"]: ann for ann in loaded.get("annotations", [])}
+                    self.rejected = set(loaded.get("info", {}).get("rejected_candidates", []))
+                print(f"✓ Loaded {len(self.annotations)} annotations")
+                loaded_any = True
             except Exception as e:
                 print(f"⚠ Load error: {e}")
-        return False
+
+        replayed = self.journal.replay(self.annotations, self.rejected)
+        if replayed:
+            print(f"↻ Replayed {replayed} unsaved edits from {self.journal.path}")
+            loaded_any = True
+
+        if self.annotations:
+            self.annotation_id = max(ann["id"] for ann in self.annotations.values()) + 1
+        self.key_frames = sorted(frame_id for frame_id, ann in self.annotations.items()
+                                 if not ann.get("interpolated"))
+        return loaded_any
+
+    def read_frame(self, frame_idx):
+        """Decoded frame `frame_idx` from the frame cache, or from the video.
+
+        Seeks go through the keyframe index (see FrameSeeker); a backward
+        jump starts `backfill` frames earlier and caches them on the way, so
+        the following steps back are served from memory.
+        """
+        return self.frame_cache.read(self.seeker, frame_idx, self.backfill)
 
     def go_to_frame(self, frame_idx):
         if 0 <= frame_idx < self.total_frames:
-            self.current_frame_idx = frame_idx
-            self.cap.set(cv2.CAP_PROP_POS_FRAMES, frame_idx)
-            ret, self.current_frame = self.cap.read()
-            if ret:
+            frame = self.read_frame(frame_idx)
+            if frame is not None:
+                self.current_frame_idx = frame_idx
+                self.current_frame = frame
+                self.current_display = None
                 print(f"→ Frame {frame_idx}")
                 return True
         return False
 
     def next_frame(self):
         if self.current_frame_idx < self.total_frames - 1:
-            self.current_frame_idx += 1
-            ret, self.current_frame = self.cap.read()
-            return ret
+            frame = self.read_frame(self.current_frame_idx + 1)
+            if frame is not None:
+                self.current_frame_idx += 1
+                self.current_frame = frame
+                self.current_display = None
+                return True
         return False
 
     def prev_frame(self):
         if self.current_frame_idx > 0:
-            return self.go_to_frame(self.current_frame_idx - 1)
+            frame = self.read_frame(self.current_frame_idx - 1)
+            if frame is not None:
+                self.current_frame_idx -= 1
+                self.current_frame = frame
+                self.current_display = None
+                return True
         return False
 
+    def start_playback(self):
+        self.prefetcher = FramePrefetcher(self.source_path, self.current_frame_idx + 1, self.prefetch_frames,
+                                          self.display_size(), self.seeker.index)
+        self.play_stats = {'shown': 0, 'dropped': 0}
+        self.dropped_pending = []
+        self.last_recorded = None
+        self.reset_play_clock()
+        self.is_playing = True
+
+    def stop_playback(self):
+        self.is_playing = False
+        if self.prefetcher is None:
+            return
+        if self.dropped_pending and self.last_recorded is not None:
+            # Dropped right before the end: nothing to interpolate towards
+            for frame_idx in self.dropped_pending:
+                self.add_annotation(frame_idx, self.last_recorded[1], self.last_recorded[2], interpolated=True)
+            self.dropped_pending = []
+        self.prefetcher.close()
+        print(f"  Playback: {self.play_stats['shown']} shown | {self.play_stats['dropped']} dropped | "
+              f"{self.prefetcher.late} late")
+        self.prefetcher = None
+
+    def reset_play_clock(self):
+        self.play_clock = (time.perf_counter(), self.current_frame_idx)
+
+    def playback_delay(self):
+        """Milliseconds until the next frame is due at the current speed"""
+        start, start_idx = self.play_clock
+        due = start + (self.current_frame_idx + 1 - start_idx) / (self.fps * self.playback_speed)
+        return max(1, int((due - time.perf_counter()) * 1000))
+
+    def advance_playback(self):
+        """Move to the frame due now by the wall clock. Frames that are
+        already late are dropped (not shown) to keep the playback rate.
+        Returns False at the end of the video."""
+        start, start_idx = self.play_clock
+        due_idx = start_idx + int((time.perf_counter() - start) * self.fps * self.playback_speed)
+        target = max(self.current_frame_idx + 1, due_idx)
+
+        while True:
+            item = self.prefetcher.get()
+            if item is FramePrefetcher.END:
+                return False
+            frame_idx, frame, display = item
+            self.frame_cache.put(frame_idx, frame)
+            if frame_idx >= target:
+                break
+            self.play_stats['dropped'] += 1
+            if self.is_recording:
+                self.dropped_pending.append(frame_idx)
+
+        self.current_frame_idx = frame_idx
+        self.current_frame = frame
+        self.current_display = display
+        self.play_stats['shown'] += 1
+        return True
+
+    def record_current(self):
+        """Annotate the frame on screen with the mouse position seen while it
+        was shown; frames dropped since the previous one are interpolated."""
+        x, y = self.mouse_x, self.mouse_y
+        if self.dropped_pending:
+            if self.last_recorded is not None:
+                f0, x0, y0 = self.last_recorded
+                for frame_idx in self.dropped_pending:
+                    t = (frame_idx - f0) / (self.current_frame_idx - f0)
+                    self.add_annotation(frame_idx, int(round(x0 + (x - x0) * t)), int(round(y0 + (y - y0) * t)),
+                                        interpolated=True)
+            else:
+                for frame_idx in self.dropped_pending:
+                    self.add_annotation(frame_idx, x, y, interpolated=True)
+            self.dropped_pending = []
+
+        self.add_annotation(self.current_frame_idx, x, y)
+        if self.last_recorded is None or self.current_frame_idx // 30 > self.last_recorded[0] // 30:
+            print(f"Recording... Frame {self.current_frame_idx} | Total: {len(self.annotations)}")
+        self.last_recorded = (self.current_frame_idx, x, y)
+
     def run(self):
         self.load_existing_annotations()
+        self.journal.start()
+        self.session_start = time.perf_counter()
+        if self.pre_annotator is not None:
+            if self.pre_annotator.start():
+                print(f"→ Pre-annotating in the background ({self.pre_annotator.model_path}): "
+                      f"{self.pre_annotator.stream_path}")
+            self.pre_annotator.poll()
+            print(f"✓ {len(self.pre_annotator.candidates)} detector candidates loaded")
 
         cv2.namedWindow(self.window_name)
         cv2.setMouseCallback(self.window_name, self.mouse_callback)
 
-        ret, self.current_frame = self.cap.read()
-        if not ret:
+        self.current_frame = self.read_frame(0)
+        if self.current_frame is None:
             print("✗ Cannot read first frame")
             return
 
@@ -237,41 +694,80 @@ class BallAnnotator:
         try:
             while True:
                 self.draw_display()
-                delay = max(1, int(base_delay / self.playback_speed))
+                delay = self.playback_delay() if self.is_playing else base_delay
                 key = cv2.waitKey(delay) & 0xFF
+                self.poll_candidates()
+
+                if self.pending_click is not None:
+                    self.stop_playback()
+                    self.add_keyframe(*self.pending_click)
+                    self.pending_click = None
 
                 if self.is_playing:
-                    if self.next_frame():
-                        if self.is_recording:
-                            self.add_annotation(self.current_frame_idx, self.mouse_x, self.mouse_y)
-                            if self.current_frame_idx % 30 == 0:
-                                print(f"Recording... Frame {self.current_frame_idx} | Total: {len(self.coco_data['annotations'])}")
-                    else:
-                        self.is_playing = False
+                    if self.is_recording:
+                        self.record_current()
+                    if not self.advance_playback():
                         print("✓ End of video")
+                        self.stop_playback()
 
                 if key == ord('q'):
+                    self.stop_playback()
                     self.save_to_file()
                     break
                 elif key == ord(' '):
-                    self.is_playing = not self.is_playing
-                    print(f"→ {'PLAYING' if self.is_playing else 'PAUSED'}")
+                    if self.is_playing:
+                        print("→ PAUSED")
+                        self.stop_playback()
+                    else:
+                        print("→ PLAYING")
+                        self.start_playback()
                 elif key == ord('r'):
                     self.is_recording = not self.is_recording
                     if self.is_recording:
                         print(f"🔴 RECORDING - Move mouse to follow ball")
                     else:
-                        print(f"⏹ STOPPED - {len(self.coco_data['annotations'])} annotations")
+                        print(f"⏹ STOPPED - {len(self.annotations)} annotations")
+                elif key == ord('k'):
+                    self.keyframe_mode = not self.keyframe_mode
+                    if self.keyframe_mode:
+                        self.is_recording = False
+                        print(f"◆ KEYFRAME MODE - click the ball, {self.interpolation} interpolation in between")
+                    else:
+                        print(f"⏹ KEYFRAME MODE OFF - {len(self.labelled)} frames labelled "
+                              f"({self.frames_per_minute():.0f}/min)")
+                elif key == ord('i'):
+                    start = time.perf_counter()
+                    filled = self.interpolate_all()
+                    print(f"✓ Interpolated {filled} frames between {len(self.key_frames)} keyframes "
+                          f"({(time.perf_counter() - start) * 1000:.0f} ms)")
                 elif key == ord('n'):
-                    self.is_playing = False
+                    self.stop_playback()
                     self.next_frame()
                 elif key == ord('p'):
-                    self.is_playing = False
+                    self.stop_playback()
                     self.prev_frame()
+                elif key == ord('a'):
+                    self.stop_playback()
+                    frame_idx = self.current_frame_idx
+                    if self.accept_candidate():
+                        print(f"✓ Accepted candidate on frame {frame_idx}")
+                elif key == ord('x'):
+                    self.stop_playback()
+                    frame_idx = self.current_frame_idx
+                    if self.reject_candidate():
+                        print(f"✗ Rejected candidate on frame {frame_idx}")
+                elif key == ord('d'):
+                    deleted = self.delete_annotation(self.current_frame_idx)
+                    if deleted is not None:
+                        print(f"✗ Deleted annotation on frame {self.current_frame_idx}")
+                        if self.keyframe_mode and not deleted.get("interpolated"):
+                            # The gap around a removed keyframe is refilled from its neighbours
+                            self.interpolate_around(self.current_frame_idx)
                 elif key == ord('s'):
-                    self.save_to_file()
+                    self.compact(indent=2)
+                    print(f"✓ Saving {len(self.annotations)} annotations in the background")
                 elif key == ord('g'):
-                    self.is_playing = False
+                    self.stop_playback()
                     print("\nFrame number: ", end='', flush=True)
                     try:
                         self.go_to_frame(int(input()))
@@ -279,9 +775,11 @@ class BallAnnotator:
                         print("Invalid")
                 elif key == ord('+') or key == ord('='):
                     self.playback_speed = min(4, self.playback_speed + 0.5)
+                    self.reset_play_clock()
                     print(f"Speed: {self.playback_speed}x")
                 elif key == ord('-'):
                     self.playback_speed = max(0.25, self.playback_speed - 0.5)
+                    self.reset_play_clock()
                     print(f"Speed: {self.playback_speed}x")
                 elif key == ord('z'):
                     if self.scale_percent == 30:
@@ -290,31 +788,82 @@ class BallAnnotator:
                         self.scale_percent = 70
                     else:
                         self.scale_percent = 30
+                    if self.cache_downscale:
+                        self.frame_cache.set_scale(self.cache_scale())
+                        self.current_frame = self.read_frame(self.current_frame_idx)
+                    if self.prefetcher is not None:
+                        self.prefetcher.display_size = self.display_size()
                     print(f"Zoom: {self.scale_percent}%")
 
         finally:
+            self.stop_playback()
+            if self.pre_annotator is not None:
+                if self.pre_annotator.running():
+                    print("⏹ Pre-annotation stopped, it resumes next session")
+                self.pre_annotator.close()
+            self.journal.close()
+            if self.journal.errors:
+                print(f"⚠ Journal errors: {self.journal.errors[-1]}")
             self.cap.release()
             cv2.destroyAllWindows()
-            print("\n✓ Session ended")
+            stats = self.frame_cache.stats()
+            print(f"\nFrame cache: {stats['frames']} frames ({stats['mb']:.0f} MB) | "
+                  f"hit rate {stats['hit_rate']:.0%} | {stats['evictions']} evictions")
+            print("✓ Session ended")
 
 
 def main():
+    parser = argparse.ArgumentParser(
+        description="Interactive ball annotator",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="Examples:\n"
+               "  python annotator.py videos/match.mp4\n"
+               "  python annotator.py videos/match.mp4 my_annotations/\n"
+               "  python annotator.py videos/match.mp4 --cache-mb 2048 --cache-downscale\n"
+               "  python annotator.py videos/match_4k.mp4 --proxy 720\n"
+               "  python annotator.py videos/match.mp4 --keyframe-step 15 --interp linear --refine\n"
+               "  python annotator.py videos/match.mp4 --pre-annotate models/yolov8n.pt\n"
+               "  python annotator.py videos/match.mp4 --binary")
+    parser.add_argument('video_path')
+    parser.add_argument('output_dir', nargs='?', default=DEFAULT_OUTPUT_DIR)
+    parser.add_argument('--cache-mb', type=float, default=DEFAULT_CACHE_MB,
+                        help="memory for recently decoded frames (default: %(default)s)")
+    parser.add_argument('--cache-downscale', action='store_true',
+                        help="cache frames at display size, so far more fit in --cache-mb")
+    parser.add_argument('--proxy', nargs='?', type=int, const=DEFAULT_PROXY_HEIGHT, metavar='HEIGHT',
+                        help=f"decode from a cached low-resolution proxy (default {DEFAULT_PROXY_HEIGHT}p "
+                             "when given without a height); annotations keep original coordinates")
+    parser.add_argument('--prefetch', type=int, default=DEFAULT_PREFETCH_FRAMES,
+                        help="frames decoded ahead of the playhead during playback (default: %(default)s)")
+    parser.add_argument('--keyframe-step', type=int, default=DEFAULT_KEYFRAME_STEP,
+                        help="frames to jump after each click in keyframe mode ('k'), 0 to stay (default: %(default)s)")
+    parser.add_argument('--interp', choices=INTERPOLATION_METHODS, default=DEFAULT_INTERPOLATION,
+                        help="how frames between keyframes are filled (default: %(default)s)")
+    parser.add_argument('--refine', action='store_true',
+                        help="snap interpolated points to a template match of the ball from the nearest keyframe")
+    parser.add_argument('--binary', action='store_true',
+                        help="also write a memory-mappable <video>_coco.npy with every save")
+    parser.add_argument('--pre-annotate', nargs='?', const=DEFAULT_MODEL_PATH, metavar='MODEL',
+                        help=f"run the detector over every frame in the background and offer its detections "
+                             f"as candidates to accept ('a') or reject ('x') (default model {DEFAULT_MODEL_PATH})")
+
     if len(sys.argv) < 2:
-        print("Usage: python annotator.py <video_path> [output_dir]")
-        print("\nExamples:")
-        print("  python annotator.py videos/match.mp4")
-        print("  python annotator.py videos/match.mp4 my_annotations/")
+        parser.print_help()
         sys.exit(1)
 
-    video_path = sys.argv[1]
-    output_dir = sys.argv[2] if len(sys.argv) > 2 else DEFAULT_OUTPUT_DIR
+    args = parser.parse_args()
+    video_path = args.video_path
 
     if not os.path.exists(video_path):
         print(f"✗ Video not found: {video_path}")
         sys.exit(1)
 
     try:
-        annotator = BallAnnotator(video_path, output_dir=output_dir)
+        annotator = BallAnnotator(video_path, output_dir=args.output_dir, cache_mb=args.cache_mb,
+                                  cache_downscale=args.cache_downscale, prefetch_frames=args.prefetch,
+                                  proxy_height=args.proxy, keyframe_step=args.keyframe_step,
+                                  interpolation=args.interp, refine=args.refine,
+                                  pre_annotate_model=args.pre_annotate, binary=args.binary)
         annotator.run()
     except Exception as e:
         print(f"✗ Error: {e}")
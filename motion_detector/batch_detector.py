@@ -0,0 +1,285 @@
+#!/usr/bin/env python3
+"""Run the YOLO ball detector over many videos with a process pool"""
+
+import argparse
+import glob
+import hashlib
+import json
+import multiprocessing
+import os
+import sys
+import time
+from pathlib import Path
+
+import cv2
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from motion_detector.detector import (BACKENDS, DEFAULT_BACKEND, DEFAULT_BATCH_SIZE, DEFAULT_CACHE_DIR,
+                                      DEFAULT_CONFIDENCE, DEFAULT_MODEL_PATH, DEFAULT_SAMPLE_RATE,
+                                      DEFAULT_SAMPLER, DEFAULT_SCALE, SAMPLERS, export_model, load_model,
+                                      validate_ball_presence, video_content_hash)
+
+DEFAULT_OUTPUT_DIR = "detections"
+VIDEO_EXTENSIONS = ('.mp4', '.mov', '.avi', '.mkv', '.m4v')
+
+_worker_model = None
+
+
+def find_videos(inputs):
+    """Expand directories and glob patterns into a sorted list of video files"""
+    videos = set()
+    for pattern in inputs:
+        if os.path.isdir(pattern):
+            for name in os.listdir(pattern):
+                if name.lower().endswith(VIDEO_EXTENSIONS):
+                    videos.add(os.path.join(pattern, name))
+        else:
+            videos.update(path for path in glob.glob(pattern) if os.path.isfile(path))
+    return sorted(videos)
+
+
+def output_names(videos):
+    """video path -> output name stem. Videos sharing a file stem (same name
+    in different directories, or another extension) get a short hash of
+    their absolute path appended so their outputs don't overwrite each other."""
+    stems = [Path(video_path).stem for video_path in videos]
+    names = {}
+    for video_path, stem in zip(videos, stems):
+        if stems.count(stem) > 1:
+            stem += "_" + hashlib.sha1(os.path.abspath(video_path).encode()).hexdigest()[:8]
+        names[video_path] = stem
+    return names
+
+
+def plan_tasks(videos, shards, sample_rate):
+    """Split each video into `shards` frame ranges aligned to the sample rate"""
+    tasks = []
+    for video_path in videos:
+        cap = cv2.VideoCapture(video_path)
+        total_frames = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
+        cap.release()
+
+        if shards <= 1 or total_frames <= 0:
+            tasks.append((video_path, 0, None))
+            continue
+
+        step = -(-total_frames // shards)
+        step += -step % sample_rate
+        for start in range(0, total_frames, step):
+            end = start + step if start + step < total_frames else None
+            tasks.append((video_path, start, end))
+    return tasks
+
+
+def _init_worker(model_path, backend, threads_per_worker):
+    global _worker_model
+    cv2.setNumThreads(threads_per_worker)
+    try:
+        import torch
+        torch.set_num_threads(threads_per_worker)
+    except ImportError:
+        pass
+    _worker_model = load_model(model_path, backend)
+
+
+def _run_task(task):
+    video_path, start_frame, end_frame, options = task
+    if _worker_model is None:
+        return video_path, start_frame, {'error': 'Model not found'}
+
+    results = validate_ball_presence(video_path, model=_worker_model, start_frame=start_frame,
+                                     end_frame=end_frame, verbose=False, **options)
+    return video_path, start_frame, results
+
+
+def merge_results(parts):
+    """Combine shard results of one video (ordered by start frame)"""
+    errors = [part['error'] for part in parts if 'error' in part]
+    if errors:
+        return {'error': errors[0]}
+
+    merged = {
+        'total_frames': parts[0]['total_frames'],
+        'frames_sampled': sum(part['frames_sampled'] for part in parts),
+        'frames_analyzed': sum(part['frames_analyzed'] for part in parts),
+        'frames_with_ball': sum(part['frames_with_ball'] for part in parts),
+        'detections': [det for part in parts for det in part['detections']],
+        'low_conf_detections': sum(part['low_conf_detections'] for part in parts),
+        'inferences_skipped': sum(part['inferences_skipped'] for part in parts),
+        'cached_frames': sum(part['cached_frames'] for part in parts),
+        'sampler': parts[0]['sampler'],
+        'batch_size': parts[0]['batch_size'],
+        'shards': len(parts)
+    }
+    for key in ('processing_time', 'decode_time', 'preprocess_time', 'inference_time', 'postprocess_time'):
+        merged[key] = sum(part[key] for part in parts)
+
+    confidence_sum = sum(part['avg_confidence'] * part['frames_with_ball'] for part in parts)
+    merged['detection_rate'] = (merged['frames_with_ball'] / merged['frames_analyzed'] * 100
+                                if merged['frames_analyzed'] > 0 else 0)
+    merged['avg_confidence'] = (confidence_sum / merged['frames_with_ball']
+                                if merged['frames_with_ball'] > 0 else 0)
+    return merged
+
+
+def run_batch(inputs, model_path=DEFAULT_MODEL_PATH, output_dir=DEFAULT_OUTPUT_DIR, processes=None,
+              shards=1, backend=DEFAULT_BACKEND, int8=False, **options):
+    """Validate every video matched by `inputs` and write per-video and aggregate JSON reports.
+
+    Each pool worker loads the model once; `shards` > 1 also splits every video
+    into time ranges so a single long match spreads over all workers.
+    """
+    videos = find_videos(inputs)
+    if not videos:
+        print("✗ No videos found")
+        return None
+    if not os.path.exists(model_path):
+        print(f"✗ Model not found: {model_path}")
+        return None
+
+    # Export once here so the workers only load the cached file
+    worker_model_path = export_model(model_path, backend, int8)
+
+    processes = processes or os.cpu_count() or 1
+    threads_per_worker = max(1, (os.cpu_count() or 1) // processes)
+    sample_rate = options.get('sample_rate', DEFAULT_SAMPLE_RATE)
+    # Hash videos up front so workers never race on the hash memo file
+    if options.get('cache_dir'):
+        for video_path in videos:
+            video_content_hash(video_path, options['cache_dir'])
+
+    # model_path/backend/int8 only feed the detection cache key in the workers
+    task_options = dict(options, model_path=model_path, backend=backend, int8=int8)
+    tasks = [(video_path, start, end, task_options)
+             for video_path, start, end in plan_tasks(videos, shards, sample_rate)]
+
+    os.makedirs(output_dir, exist_ok=True)
+
+    print(f"\n{'='*70}")
+    print(f"BATCH DETECTOR")
+    print(f"{'='*70}")
+    print(f"Videos: {len(videos)} | Tasks: {len(tasks)} | Processes: {processes}")
+    print(f"Model: {model_path} ({backend}{', int8' if int8 else ''})")
+    print(f"{'='*70}\n")
+
+    start_time = time.time()
+    parts = {video_path: [] for video_path in videos}
+
+    with multiprocessing.Pool(processes, initializer=_init_worker,
+                              initargs=(worker_model_path, backend, threads_per_worker)) as pool:
+        for done, (video_path, start_frame, results) in enumerate(pool.imap_unordered(_run_task, tasks), 1):
+            parts[video_path].append((start_frame, results))
+            print(f"\r[{done}/{len(tasks)}] {Path(video_path).name} (from frame {start_frame})", end='')
+
+    wall_time = time.time() - start_time
+    print()
+
+    report = {
+        'model': model_path,
+        'backend': backend,
+        'int8': int8,
+        'options': options,
+        'processes': processes,
+        'shards': shards,
+        'wall_time': wall_time,
+        'videos': {}
+    }
+
+    names = output_names(videos)
+    for video_path in videos:
+        results = merge_results([res for _, res in sorted(parts[video_path], key=lambda part: part[0])])
+        results['video'] = video_path
+
+        output_file = os.path.join(output_dir, f"{names[video_path]}_detections.json")
+        with open(output_file, 'w') as f:
+            json.dump(results, f, indent=2)
+
+        report['videos'][video_path] = {key: value for key, value in results.items() if key != 'detections'}
+        report['videos'][video_path]['output_file'] = output_file
+
+    ok = [res for res in report['videos'].values() if 'error' not in res]
+    report['frames_sampled'] = sum(res['frames_sampled'] for res in ok)
+    report['frames_analyzed'] = sum(res['frames_analyzed'] for res in ok)
+    report['frames_with_ball'] = sum(res['frames_with_ball'] for res in ok)
+    report['detection_rate'] = (report['frames_with_ball'] / report['frames_analyzed'] * 100
+                                if report['frames_analyzed'] > 0 else 0)
+    report['throughput_fps'] = report['frames_sampled'] / wall_time if wall_time > 0 else 0
+
+    report_file = os.path.join(output_dir, "batch_report.json")
+    with open(report_file, 'w') as f:
+        json.dump(report, f, indent=2)
+    report['report_file'] = report_file
+
+    return report
+
+
+def print_batch_report(report):
+    print("\n" + "=" * 70)
+    print("BATCH REPORT")
+    print("=" * 70)
+    for video_path, results in report['videos'].items():
+        name = Path(video_path).name
+        if 'error' in results:
+            print(f"✗ {name}: {results['error']}")
+        else:
+            print(f"✓ {name}: {results['frames_with_ball']}/{results['frames_analyzed']} "
+                  f"({results['detection_rate']:.1f}%)")
+    print("-" * 70)
+    print(f"Frames sampled:    {report['frames_sampled']}")
+    print(f"Frames analyzed:   {report['frames_analyzed']}")
+    print(f"Detection rate:    {report['detection_rate']:.1f}%")
+    print(f"Wall time:         {report['wall_time']:.1f}s")
+    print(f"Throughput:        {report['throughput_fps']:.1f} fps ({report['processes']} processes)")
+    print(f"Report:            {report['report_file']}")
+    print("=" * 70)
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Run the YOLO ball detector over a folder of videos",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="Examples:\n"
+               "  python batch_detector.py videos/\n"
+               "  python batch_detector.py 'videos/match_*.mp4' --processes 8\n"
+               "  python batch_detector.py videos/full_match.mp4 --shards 8")
+    parser.add_argument('inputs', nargs='+', help="video files, directories or glob patterns")
+    parser.add_argument('--model', default=DEFAULT_MODEL_PATH)
+    parser.add_argument('--output-dir', default=DEFAULT_OUTPUT_DIR)
+    parser.add_argument('--processes', type=int, default=None,
+                        help="worker processes (default: CPU count)")
+    parser.add_argument('--shards', type=int, default=1,
+                        help="split each video into this many time ranges (default: %(default)s)")
+    parser.add_argument('--sample-rate', type=int, default=DEFAULT_SAMPLE_RATE)
+    parser.add_argument('--sampler', choices=SAMPLERS, default=DEFAULT_SAMPLER)
+    parser.add_argument('--batch-size', type=int, default=DEFAULT_BATCH_SIZE)
+    parser.add_argument('--scale', type=float, default=DEFAULT_SCALE)
+    parser.add_argument('--conf', type=float, default=DEFAULT_CONFIDENCE)
+    parser.add_argument('--motion-threshold', type=float, default=None)
+    parser.add_argument('--roi', action='store_true')
+    parser.add_argument('--tiles', action='store_true')
+    parser.add_argument('--backend', choices=BACKENDS, default=DEFAULT_BACKEND)
+    parser.add_argument('--int8', action='store_true')
+    parser.add_argument('--cache', action='store_true', help="reuse cached per-frame detections")
+    parser.add_argument('--cache-dir', default=DEFAULT_CACHE_DIR)
+
+    if len(sys.argv) < 2:
+        parser.print_help()
+        sys.exit(1)
+
+    args = parser.parse_args()
+
+    report = run_batch(args.inputs, model_path=args.model, output_dir=args.output_dir,
+                       processes=args.processes, shards=args.shards, backend=args.backend, int8=args.int8,
+                       sample_rate=args.sample_rate,
+                       sampler=args.sampler, batch_size=args.batch_size, scale=args.scale, conf=args.conf,
+                       motion_threshold=args.motion_threshold, roi=args.roi, tiles=args.tiles,
+                       cache_dir=args.cache_dir if args.cache else None)
+    if report is None:
+        sys.exit(1)
+
+    print_batch_report(report)
+
+
+if __name__ == "__main__":
+    main()
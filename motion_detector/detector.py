@@ -1,25 +1,830 @@
 #!/usr/bin/env python3
 """YOLO ball detector"""
 
+import argparse
+import cProfile
 import cv2
+import numpy as np
 from ultralytics import YOLO
+import queue
+import threading
 import time
 import sys
 import os
+import hashlib
+import json
+import pstats
+import shutil
+from collections import deque
+from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor
+
+try:
+    import fcntl
+except ImportError:  # Windows: no advisory locks; shards sharing a cache file are unsupported there
+    fcntl = None
 
 DEFAULT_MODEL_PATH = "models/yolov8n.pt"
 DEFAULT_SAMPLE_RATE = 10
 DEFAULT_SCALE = 0.4
 DEFAULT_CONFIDENCE = 0.03
+LOW_CONF_THRESHOLD = 0.1
+CROP_TOP = 0.25
+CROP_BOTTOM = 0.92
+DEFAULT_SAMPLER = "auto"
+DEFAULT_BATCH_SIZE = 1
+DEFAULT_WORKERS = 0  # 0 = decode, preprocess and infer serially in one loop
+DEFAULT_QUEUE_SIZE = 32
+DEFAULT_MOTION_THRESHOLD = None  # fraction of changed pixels; None disables the gate
+DEFAULT_MOTION_MAX_SKIP = 30
+MOTION_SIZE = (160, 64)
+MOTION_PIXEL_DELTA = 20
+DEFAULT_ROI_SIZE = 320  # full-resolution window around the predicted ball, multiple of 32
+DEFAULT_ROI_MIN_CONF = 0.05  # below this the frame is searched full-frame again
+ROI_MAX_GAP = 3  # sampled frames without a detection before the track is dropped
+DEFAULT_TILE_SIZE = 640
+DEFAULT_TILE_OVERLAP = 0.2
+TILE_NMS_IOU = 0.4
+SEEK_STRIDE = 120  # from this stride on, seeking beats decoding the whole GOP
 
-def validate_ball_presence(video_path, model_path=DEFAULT_MODEL_PATH, sample_rate=DEFAULT_SAMPLE_RATE,
-                          scale=DEFAULT_SCALE, conf=DEFAULT_CONFIDENCE):
+SAMPLERS = ("read", "grab", "seek", "auto")
+BACKENDS = ("pt", "onnx", "openvino")
+DEFAULT_BACKEND = "pt"
+EXPORT_DIR = "models/exported"
+EXPORT_IMGSZ = 640
+DEFAULT_CACHE_DIR = "cache/detections"
+CHECKPOINT_EVERY = 250  # sampled frames between stream checkpoints
+PROFILE_ENV = "DETECTOR_PROFILE"  # set to 1 to profile without touching the call site
+PROFILE_PERCENTILES = (50, 95, 99)
+
+
+def resolve_sampler(sampler, sample_rate):
+    if sampler not in SAMPLERS:
+        raise ValueError(f"Unknown sampler: {sampler}")
+    if sampler == "auto":
+        return "seek" if sample_rate >= SEEK_STRIDE else "grab"
+    return sampler
+
+
+class StageTimer(dict):
+    """Per-stage time totals, plus optional latency samples, counters and a
+    Chrome trace (chrome://tracing / Perfetto) of every timed span.
+
+    The totals are always kept (they feed decode_time, inference_time, ...).
+    Samples, counters and trace events are only recorded while `enabled`,
+    which can be flipped at any point of a run; disabled, add() is one dict
+    update and count() a single attribute check.
+    """
+
+    def __init__(self, stages=(), enabled=False, trace=False):
+        super().__init__((stage, 0.0) for stage in stages)
+        self.enabled = enabled
+        self.trace = trace
+        self.samples = {}
+        self.counters = {}
+        self.events = []
+        self.origin = time.perf_counter()
+
+    def add(self, stage, elapsed):
+        self[stage] = self.get(stage, 0.0) + elapsed
+        if self.enabled:
+            self.samples.setdefault(stage, []).append(elapsed)
+            if self.trace:
+                end = time.perf_counter() - self.origin
+                self.events.append((stage, end - elapsed, elapsed, threading.get_ident()))
+
+    def count(self, name, n=1):
+        if self.enabled:
+            self.counters[name] = self.counters.get(name, 0) + n
+
+    def report(self):
+        """Latency percentiles (ms) per stage and the counters"""
+        stages = {}
+        for stage, samples in self.samples.items():
+            values = np.array(samples) * 1000
+            stages[stage] = {
+                'count': len(values),
+                'total_ms': float(values.sum()),
+                'mean_ms': float(values.mean()),
+                'max_ms': float(values.max()),
+                **{f"p{q}_ms": float(v) for q, v in zip(PROFILE_PERCENTILES,
+                                                       np.percentile(values, PROFILE_PERCENTILES))}
+            }
+        return {'stages': stages, 'counters': dict(self.counters)}
+
+    def write_trace(self, path):
+        events = [{'name': stage, 'ph': 'X', 'pid': os.getpid(), 'tid': tid,
+                   'ts': start * 1e6, 'dur': elapsed * 1e6}
+                  for stage, start, elapsed, tid in self.events]
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        with open(path, 'w') as f:
+            json.dump({'traceEvents': events}, f)
+
+
+def record_model_speed(timings, preds):
+    """Split the model call into ultralytics' own preprocess / forward / NMS
+    timings (ms per image), when profiling."""
+    if not timings.enabled:
+        return
+    for pred in preds:
+        speed = getattr(pred, 'speed', None) or {}
+        for part, stage in (('preprocess', 'model_preprocess'), ('inference', 'model_forward'),
+                            ('postprocess', 'model_nms')):
+            if speed.get(part) is not None:
+                timings.samples.setdefault(stage, []).append(speed[part] / 1000)
+
+
+def iter_sampled_frames(cap, sample_rate, sampler=DEFAULT_SAMPLER, timings=None,
+                        start_frame=0, end_frame=None, skip=()):
+    """Yield (frame_idx, frame) for every sample_rate-th frame (1-based index).
+
+    'read' decodes every frame, 'grab' only grabs skipped frames and retrieves
+    the sampled ones, 'seek' jumps to each sampled frame. 'auto' picks 'seek'
+    for strides of SEEK_STRIDE or more and 'grab' otherwise. Time spent in the
+    capture is accumulated in timings['decode'], one sample per sampled frame
+    (grabs of skipped frames are charged to the next sampled one).
+
+    start_frame/end_frame restrict the scan to start_frame < frame_idx <= end_frame;
+    the sampled indices are the same as in a full scan, so shards can be merged.
+    Sampled frames listed in `skip` are not decoded and yield (frame_idx, None).
+    """
+    sampler = resolve_sampler(sampler, sample_rate)
+    if timings is None:
+        timings = StageTimer()
+
+    total_frames = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
+    seek_limit = end_frame if end_frame is not None else total_frames
+
+    frame_idx = start_frame
+    if sampler == "seek":
+        frame_idx -= start_frame % sample_rate
+    elif start_frame > 0:
+        cap.set(cv2.CAP_PROP_POS_FRAMES, start_frame)
+
+    pending = 0.0  # decode time of skipped frames, charged to the next sampled one
+
+    while True:
+        t0 = time.perf_counter()
+
+        if end_frame is not None and frame_idx >= end_frame:
+            break
+
+        if sampler == "seek":
+            frame_idx += sample_rate
+            if seek_limit > 0 and frame_idx > seek_limit:
+                break
+            if frame_idx in skip:
+                timings.count('frames_skipped_cached')
+                yield frame_idx, None
+                continue
+            timings.count('seeks')
+            cap.set(cv2.CAP_PROP_POS_FRAMES, frame_idx - 1)
+            ret, frame = cap.read()
+        elif sampler == "grab":
+            ret = cap.grab()
+            timings.count('grabs')
+            if ret:
+                frame_idx += 1
+                if frame_idx % sample_rate != 0:
+                    pending += time.perf_counter() - t0
+                    continue
+                if frame_idx in skip:
+                    timings.add('decode', pending + time.perf_counter() - t0)
+                    pending = 0.0
+                    timings.count('frames_skipped_cached')
+                    yield frame_idx, None
+                    continue
+                ret, frame = cap.retrieve()
+        else:
+            ret, frame = cap.read()
+            timings.count('reads')
+            if ret:
+                frame_idx += 1
+                if frame_idx % sample_rate != 0:
+                    pending += time.perf_counter() - t0
+                    continue
+
+        timings.add('decode', pending + time.perf_counter() - t0)
+        pending = 0.0
+        if not ret:
+            break
+
+        yield frame_idx, (None if frame_idx in skip else frame)
+
+
+def preprocess_frame(frame, scale):
+    h, w = frame.shape[:2]
+    frame_small = cv2.resize(frame, (int(w * scale), int(h * scale)))
+    crop_h = frame_small.shape[0]
+    frame_crop = frame_small[int(crop_h * CROP_TOP):int(crop_h * CROP_BOTTOM), :]
+    return cv2.GaussianBlur(frame_crop, (3, 3), 0)
+
+
+def _crop_geometry(frame_shape, scale):
+    h, w = frame_shape[:2]
+    small_w, small_h = int(w * scale), int(h * scale)
+    return small_w / w, small_h / h, int(small_h * CROP_TOP)
+
+
+def crop_to_frame_bbox(bbox, frame_shape, scale):
+    """Map xyxy boxes (one box or an (N, 4) array) from preprocess_frame's crop
+    back to original-frame pixels"""
+    sx, sy, y0 = _crop_geometry(frame_shape, scale)
+    return ((np.asarray(bbox, dtype=np.float64) + [0, y0, 0, y0]) / [sx, sy, sx, sy]).tolist()
+
+
+def frame_to_crop_bbox(bbox, frame_shape, scale):
+    """Inverse of crop_to_frame_bbox"""
+    sx, sy, y0 = _crop_geometry(frame_shape, scale)
+    return (np.asarray(bbox, dtype=np.float64) * [sx, sy, sx, sy] - [0, y0, 0, y0]).tolist()
+
+
+def _timed_preprocess(frame, scale):
+    if frame is None:
+        return None, 0.0
+    t0 = time.perf_counter()
+    crop = preprocess_frame(frame, scale)
+    return crop, time.perf_counter() - t0
+
+
+def iter_preprocessed_frames(cap, sample_rate, scale, sampler=DEFAULT_SAMPLER, timings=None,
+                             frame_range=(0, None), skip=()):
+    """Serial source: yield (frame_idx, frame, crop) from the calling thread."""
+    if timings is None:
+        timings = StageTimer()
+
+    for frame_idx, frame in iter_sampled_frames(cap, sample_rate, sampler, timings, *frame_range, skip):
+        crop, elapsed = _timed_preprocess(frame, scale)
+        if frame is not None:
+            timings.add('preprocess', elapsed)
+        yield frame_idx, frame, crop
+
+
+def iter_pipelined_frames(cap, sample_rate, scale, sampler=DEFAULT_SAMPLER, timings=None,
+                          frame_range=(0, None), skip=(), workers=2, queue_size=DEFAULT_QUEUE_SIZE,
+                          stats=None):
+    """Threaded source: yield (frame_idx, frame, crop) in frame order.
+
+    A decode thread feeds a pool of preprocess workers; the pending futures go
+    through a bounded queue in submission order, so the consumer (inference)
+    sees frames in order and at most queue_size frames are in flight. Queue
+    depth and stalls are recorded in stats.
+    """
+    if timings is None:
+        timings = StageTimer()
+    if stats is None:
+        stats = {}
+    stats.update({'queue_depth_sum': 0, 'queue_depth_max': 0, 'gets': 0, 'consumer_stalls': 0})
+
+    pending = queue.Queue(maxsize=queue_size)
+    stop = threading.Event()
+    done = object()
+    pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="preprocess")
+
+    def put(item):
+        while not stop.is_set():
+            try:
+                pending.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def decode():
+        try:
+            for frame_idx, frame in iter_sampled_frames(cap, sample_rate, sampler, timings, *frame_range, skip):
+                if not put((frame_idx, frame, pool.submit(_timed_preprocess, frame, scale))):
+                    return
+        except Exception as e:
+            put(e)
+            return
+        put(done)
+
+    decoder = threading.Thread(target=decode, name="decode", daemon=True)
+    decoder.start()
+
+    try:
+        while True:
+            depth = pending.qsize()
+            stats['gets'] += 1
+            stats['queue_depth_sum'] += depth
+            stats['queue_depth_max'] = max(stats['queue_depth_max'], depth)
+            if depth == 0:
+                stats['consumer_stalls'] += 1
+
+            item = pending.get()
+            if item is done:
+                break
+            if isinstance(item, Exception):
+                raise item
+
+            frame_idx, frame, future = item
+            crop, elapsed = future.result()
+            if frame is not None:
+                timings.add('preprocess', elapsed)
+            yield frame_idx, frame, crop
+    finally:
+        stop.set()
+        while not pending.empty():
+            pending.get_nowait()
+        decoder.join()
+        pool.shutdown(wait=True)
+
+
+class MotionGate:
+    """Cheap frame-differencing gate in front of the model.
+
+    Each crop is shrunk to MOTION_SIZE grayscale and compared with the last
+    crop that was let through; it passes when at least `threshold` of the
+    pixels changed by more than MOTION_PIXEL_DELTA. After `max_skip` skipped
+    frames in a row the next one passes anyway, so static shots are still
+    sampled now and then.
+    """
+
+    def __init__(self, threshold, max_skip=DEFAULT_MOTION_MAX_SKIP):
+        self.threshold = threshold
+        self.max_skip = max_skip
+        self.reference = None
+        self.skipped_in_row = 0
+        self.skipped = 0
+
+    def should_infer(self, crop):
+        small = cv2.resize(cv2.cvtColor(crop, cv2.COLOR_BGR2GRAY), MOTION_SIZE,
+                           interpolation=cv2.INTER_AREA)
+
+        if self.reference is not None and self.skipped_in_row < self.max_skip:
+            diff = cv2.absdiff(small, self.reference)
+            changed = np.count_nonzero(diff > MOTION_PIXEL_DELTA) / diff.size
+            if changed < self.threshold:
+                self.skipped_in_row += 1
+                self.skipped += 1
+                return False
+
+        self.reference = small
+        self.skipped_in_row = 0
+        return True
+
+
+class BallTrack:
+    """Constant-velocity prediction of the ball center (original-frame pixels)
+    from the two most recent detections."""
+
+    def __init__(self, max_gap):
+        self.max_gap = max_gap
+        self.history = deque(maxlen=2)
+
+    def update(self, frame_idx, center):
+        self.history.append((frame_idx, center[0], center[1]))
+
+    def predict(self, frame_idx):
+        if not self.history or frame_idx - self.history[-1][0] > self.max_gap:
+            return None
+
+        f1, x1, y1 = self.history[-1]
+        vx = vy = 0.0
+        if len(self.history) == 2:
+            f0, x0, y0 = self.history[0]
+            if 0 < f1 - f0 <= self.max_gap:
+                vx = (x1 - x0) / (f1 - f0)
+                vy = (y1 - y0) / (f1 - f0)
+
+        return x1 + vx * (frame_idx - f1), y1 + vy * (frame_idx - f1)
+
+
+def ball_class_id(names):
+    """Class index of 'sports ball' in a model's names (dict or list)"""
+    items = names.items() if isinstance(names, dict) else enumerate(names)
+    return next((int(idx) for idx, name in items if name == 'sports ball'), None)
+
+
+def ball_boxes(preds, names):
+    """All 'sports ball' boxes of several predictions as numpy arrays.
+
+    The boxes of every prediction are concatenated and moved to the CPU in a
+    single transfer; returns (xyxy (N, 4), conf (N,), owner (N,)) where owner
+    is the index of the prediction each box came from.
+    """
+    counts = [len(pred.boxes) for pred in preds]
+    ball_cls = ball_class_id(names)
+    if not sum(counts) or ball_cls is None:
+        return np.zeros((0, 4)), np.zeros(0), np.zeros(0, dtype=np.int64)
+
+    parts = [pred.boxes.data for pred, n in zip(preds, counts) if n]
+    if hasattr(parts[0], 'cpu'):
+        import torch
+        data = torch.cat(parts).cpu().numpy()
+    else:
+        data = np.concatenate(parts)
+
+    owner = np.repeat(np.arange(len(preds)), counts)
+    keep = data[:, 5] == ball_cls
+    return data[keep, :4].astype(np.float64), data[keep, 4].astype(np.float64), owner[keep]
+
+
+def best_ball_boxes(preds, names):
+    """(confidence, xyxy array) of the most confident 'sports ball' box for each
+    prediction, or None where there is none; one segmented argmax over the
+    boxes of the whole batch."""
+    xyxy, conf, owner = ball_boxes(preds, names)
+    best = [None] * len(preds)
+    if not len(conf):
+        return best
+
+    # Sort by owner, then by descending confidence: each owner's first row is its best box
+    order = np.lexsort((-conf, owner))
+    owners, first = np.unique(owner[order], return_index=True)
+    for i, row in zip(owners, order[first]):
+        best[i] = (float(conf[row]), xyxy[row])
+    return best
+
+
+def best_ball_box(pred, names):
+    """(confidence, xyxy) of the most confident 'sports ball' box, or None"""
+    best = best_ball_boxes([pred], names)[0]
+    return (best[0], best[1].tolist()) if best else None
+
+
+def detect_batch(model, batch, conf, fps, timings, frame_shape, scale):
+    """Run one model call over [(frame_idx, crop), ...] and return the best
+    'sports ball' detection (or None) for each entry, in batch order, with
+    the bbox in original-frame pixels."""
+    t0 = time.perf_counter()
+    preds = model([crop for _, crop in batch], conf=conf, verbose=False, classes=[32], iou=0.4)
+    timings.add('inference', time.perf_counter() - t0)
+    timings.count('model_calls')
+    timings.count('model_images', len(batch))
+    record_model_speed(timings, preds)
+
+    t0 = time.perf_counter()
+    detections = []
+    for (frame_idx, _), best in zip(batch, best_ball_boxes(preds, model.names)):
+        detections.append({
+            'frame': frame_idx,
+            'time': frame_idx / fps,
+            'confidence': best[0],
+            'bbox': crop_to_frame_bbox(best[1], frame_shape, scale),
+            'source': 'full'
+        } if best else None)
+    timings.add('postprocess', time.perf_counter() - t0)
+
+    return detections
+
+
+def tile_origins(length, tile_size, overlap):
+    """Start offsets of overlapping tiles covering [0, length)"""
+    if length <= tile_size:
+        return [0]
+    stride = max(1, int(tile_size * (1 - overlap)))
+    return list(range(0, length - tile_size, stride)) + [length - tile_size]
+
+
+def make_tiles(frame, tile_size, overlap):
+    """Cut the full-resolution crop band of `frame` into overlapping tiles.
+    Returns the tiles and their (x, y) offsets in frame pixels."""
+    h = frame.shape[0]
+    top = int(h * CROP_TOP)
+    band = cv2.GaussianBlur(frame[top:int(h * CROP_BOTTOM)], (3, 3), 0)
+    band_h, band_w = band.shape[:2]
+
+    tiles = []
+    offsets = []
+    for y in tile_origins(band_h, tile_size, overlap):
+        for x in tile_origins(band_w, tile_size, overlap):
+            tiles.append(band[y:y + tile_size, x:x + tile_size])
+            offsets.append((x, y + top))
+    return tiles, offsets
+
+
+def merge_tile_boxes(boxes, scores, iou=TILE_NMS_IOU):
+    """NMS over boxes gathered from all tiles of one frame; returns the kept
+    (score, xyxy) pairs, best first."""
+    if not boxes:
+        return []
+    xywh = [[x1, y1, x2 - x1, y2 - y1] for x1, y1, x2, y2 in boxes]
+    keep = np.array(cv2.dnn.NMSBoxes(xywh, scores, 0.0, iou)).flatten()
+    return sorted(((scores[i], boxes[i]) for i in keep), key=lambda item: -item[0])
+
+
+def detect_tiled(model, batch, conf, fps, timings, tile_size=DEFAULT_TILE_SIZE,
+                 overlap=DEFAULT_TILE_OVERLAP):
+    """Tiled (SAHI-style) search over [(frame_idx, frame), ...] at full resolution.
+
+    The tiles of every frame in the batch go through the model in one call;
+    ball boxes are shifted back to frame pixels, merged across tiles with
+    NMS, and the best one per frame is returned (bbox in frame pixels).
+    """
+    tiles = []
+    owners = []
+    offsets = []
+    for i, (_, frame) in enumerate(batch):
+        frame_tiles, frame_offsets = make_tiles(frame, tile_size, overlap)
+        tiles.extend(frame_tiles)
+        owners.extend([i] * len(frame_tiles))
+        offsets.extend(frame_offsets)
+
+    t0 = time.perf_counter()
+    preds = model(tiles, conf=conf, verbose=False, classes=[32], iou=0.4, imgsz=tile_size)
+    timings.add('inference', time.perf_counter() - t0)
+    timings.count('model_calls')
+    timings.count('model_images', len(tiles))
+    record_model_speed(timings, preds)
+
+    t0 = time.perf_counter()
+    xyxy, scores, tile = ball_boxes(preds, model.names)
+    xyxy += np.tile(np.asarray(offsets, dtype=np.float64).reshape(-1, 2), 2)[tile]
+    frame_of_box = np.asarray(owners, dtype=np.int64)[tile]
+
+    detections = []
+    for i, (frame_idx, _) in enumerate(batch):
+        mine = frame_of_box == i
+        merged = merge_tile_boxes(xyxy[mine].tolist(), scores[mine].tolist())
+        detections.append({
+            'frame': frame_idx,
+            'time': frame_idx / fps,
+            'confidence': merged[0][0],
+            'bbox': merged[0][1],
+            'source': 'tiles'
+        } if merged else None)
+    timings.add('postprocess', time.perf_counter() - t0)
+
+    return detections
+
+
+def detect_roi(model, frame, center, roi_size, conf, timings):
+    """Run the model on a roi_size window of the full-resolution frame centred
+    on `center`; returns (confidence, xyxy in frame pixels) or None."""
+    h, w = frame.shape[:2]
+    x0 = int(min(max(center[0] - roi_size / 2, 0), max(w - roi_size, 0)))
+    y0 = int(min(max(center[1] - roi_size / 2, 0), max(h - roi_size, 0)))
+    window = cv2.GaussianBlur(frame[y0:y0 + roi_size, x0:x0 + roi_size], (3, 3), 0)
+
+    t0 = time.perf_counter()
+    preds = model(window, conf=conf, verbose=False, classes=[32], iou=0.4, imgsz=roi_size)
+    timings.add('inference', time.perf_counter() - t0)
+    timings.count('model_calls')
+    timings.count('model_images')
+    record_model_speed(timings, preds)
+
+    t0 = time.perf_counter()
+    best = best_ball_boxes(preds, model.names)[0]
+    timings.add('postprocess', time.perf_counter() - t0)
+    if best is None:
+        return None
+
+    return best[0], (best[1] + [x0, y0, x0, y0]).tolist()
+
+
+def file_sha256(path, chunk_size=1 << 20):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def export_model(model_path, backend, int8=False, export_dir=EXPORT_DIR):
+    """Return the path of `model_path` exported to `backend`, exporting it once.
+
+    Exports are cached under export_dir in a folder keyed on the SHA-256 of
+    the source weights, so replacing the .pt file triggers a fresh export.
+    Models are exported with dynamic shapes, which keeps batching, ROI and
+    tile sizes working; preprocessing and box decoding stay in ultralytics,
+    identical to the .pt path.
+    """
+    if backend == "pt" or not model_path.endswith('.pt'):
+        return model_path
+    if int8 and backend != "openvino":
+        print(f"⚠ int8 export is only supported for openvino, exporting {backend} in fp32")
+        int8 = False
+
+    key = f"{Path(model_path).stem}-{file_sha256(model_path)[:16]}-{backend}{'-int8' if int8 else ''}"
+    cache_dir = os.path.join(export_dir, key)
+    target = os.path.join(cache_dir, f"{Path(model_path).stem}.onnx" if backend == "onnx"
+                          else f"{Path(model_path).stem}_openvino_model")
+    if os.path.exists(target):
+        return target
+
+    print(f"→ Exporting {model_path} to {backend}{' (int8)' if int8 else ''} (one-time)...")
+    exported = YOLO(model_path).export(format=backend, dynamic=True, int8=int8,
+                                       imgsz=EXPORT_IMGSZ, verbose=False)
+
+    os.makedirs(cache_dir, exist_ok=True)
+    shutil.move(str(exported), target)
+    print(f"✓ Cached export: {target}")
+    return target
+
+
+def load_model(model_path, backend=DEFAULT_BACKEND, int8=False):
     if not os.path.exists(model_path):
         print(f"✗ Model not found: {model_path}")
         print(f"  Download from: https://github.com/ultralytics/assets/releases/download/v0.0.0/yolov8n.pt")
-        return {'error': 'Model not found'}
+        return None
+
+    if backend not in BACKENDS:
+        raise ValueError(f"Unknown backend: {backend}")
+
+    return YOLO(export_model(model_path, backend, int8), task='detect')
+
+
+def video_content_hash(video_path, cache_dir=DEFAULT_CACHE_DIR):
+    """SHA-256 of the video file, memoized in cache_dir by path, size and mtime"""
+    stat = os.stat(video_path)
+    memo_key = f"{os.path.abspath(video_path)}|{stat.st_size}|{stat.st_mtime_ns}"
+    memo_file = os.path.join(cache_dir, "video_hashes.json")
+
+    memo = {}
+    if os.path.exists(memo_file):
+        with open(memo_file, 'r') as f:
+            memo = json.load(f)
+    if memo_key in memo:
+        return memo[memo_key]
+
+    print(f"→ Hashing {video_path} (one-time)...")
+    memo[memo_key] = file_sha256(video_path)
+    os.makedirs(cache_dir, exist_ok=True)
+    with open(memo_file, 'w') as f:
+        json.dump(memo, f, indent=2)
+    return memo[memo_key]
+
+
+class DetectionCache:
+    """Raw per-frame detections for one (video, model, parameters) key.
+
+    Stored as an append-only JSONL file with one {"frame", "detection"} line per
+    analyzed frame; frames without a ball are stored as null so a rerun knows
+    they are done. `key_inputs` is written next to it for inspection.
+
+    Shards of one video (batch_detector --shards) append to the same file, so
+    every append and the crash repair in load() hold an exclusive file lock.
+    """
+
+    def __init__(self, cache_dir, key_inputs):
+        key = hashlib.sha256(json.dumps(key_inputs, sort_keys=True).encode()).hexdigest()[:24]
+        os.makedirs(cache_dir, exist_ok=True)
+        self.path = os.path.join(cache_dir, f"{key}.jsonl")
+        self.frames = {}
+        self._file = None
+
+        meta_path = os.path.join(cache_dir, f"{key}.json")
+        if not os.path.exists(meta_path):
+            with open(meta_path, 'w') as f:
+                json.dump(key_inputs, f, indent=2)
+
+    def load(self):
+        if not os.path.exists(self.path):
+            return self.frames
+
+        with open(self.path, 'r+b') as f:
+            if fcntl is not None:
+                fcntl.flock(f, fcntl.LOCK_EX)
+            data = f.read()
+            complete = data.rfind(b"\n") + 1
+            for line in data[:complete].splitlines():
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    continue  # a crash fragment that a later append was glued onto
+                self.frames[record['frame']] = record['detection']
+
+            # Drop a half-written last line left by a crash, so appends start on a new line.
+            # Writers hold the lock, so this is never a write still in progress.
+            if complete < len(data):
+                f.truncate(complete)
+        return self.frames
+
+    def store(self, frame_idx, detection):
+        self.frames[frame_idx] = detection
+        if self._file is None:
+            self._file = open(self.path, 'ab')
+        line = (json.dumps({'frame': frame_idx, 'detection': detection}) + "\n").encode()
+        if fcntl is not None:
+            fcntl.flock(self._file, fcntl.LOCK_EX)
+        try:
+            self._file.write(line)
+            self._file.flush()
+        finally:
+            if fcntl is not None:
+                fcntl.flock(self._file, fcntl.LOCK_UN)
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+
+class DetectionStream:
+    """Detections appended to a JSONL file as they are produced, plus a
+    checkpoint (<path>.ckpt) recording the last fully processed frame, the
+    file offset at that point and the running counters."""
+
+    def __init__(self, path, run_params):
+        self.path = path
+        self.checkpoint_path = path + ".ckpt"
+        self.run_params = run_params
+        self._file = None
+
+    def resume(self):
+        """Open the stream; return the checkpoint to continue from, or None
+        when starting over (no checkpoint, or it belongs to another run)."""
+        state = None
+        if os.path.exists(self.checkpoint_path):
+            with open(self.checkpoint_path, 'r') as f:
+                state = json.load(f)
+            if state.get('params') != self.run_params:
+                print(f"⚠ {self.checkpoint_path} is from a different run, starting over")
+                state = None
+
+        if state is not None and os.path.exists(self.path):
+            # Drop detections written after the checkpoint; they are recomputed
+            with open(self.path, 'r+b') as f:
+                f.truncate(state['offset'])
+            self._file = open(self.path, 'ab')
+        else:
+            state = None
+            os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+            self._file = open(self.path, 'wb')
+        return state
+
+    def write(self, detection):
+        self._file.write((json.dumps(detection) + "\n").encode())
+
+    def checkpoint(self, last_frame, counters, complete=False):
+        self._file.flush()
+        os.fsync(self._file.fileno())
+        state = {
+            'params': self.run_params,
+            'last_frame': last_frame,
+            'offset': self._file.tell(),
+            'counters': counters,
+            'complete': complete
+        }
+        tmp_path = self.checkpoint_path + ".tmp"
+        with open(tmp_path, 'w') as f:
+            json.dump(state, f)
+        os.replace(tmp_path, self.checkpoint_path)
 
-    model = YOLO(model_path)
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+
+def validate_ball_presence(video_path, model_path=DEFAULT_MODEL_PATH, sample_rate=DEFAULT_SAMPLE_RATE,
+                          scale=DEFAULT_SCALE, conf=DEFAULT_CONFIDENCE, sampler=DEFAULT_SAMPLER,
+                          batch_size=DEFAULT_BATCH_SIZE, workers=DEFAULT_WORKERS,
+                          queue_size=DEFAULT_QUEUE_SIZE, model=None, start_frame=0, end_frame=None,
+                          motion_threshold=DEFAULT_MOTION_THRESHOLD, motion_max_skip=DEFAULT_MOTION_MAX_SKIP,
+                          roi=False, roi_size=DEFAULT_ROI_SIZE, roi_min_conf=DEFAULT_ROI_MIN_CONF,
+                          tiles=False, tile_size=DEFAULT_TILE_SIZE, tile_overlap=DEFAULT_TILE_OVERLAP,
+                          backend=DEFAULT_BACKEND, int8=False, cache_dir=None,
+                          low_conf_threshold=LOW_CONF_THRESHOLD, stream_path=None, profile=None,
+                          profile_path=None, trace_path=None, verbose=True):
+    """Sample the video and report how often the model finds the ball.
+
+    Pass an already loaded model to reuse it across calls; start_frame and
+    end_frame limit the run to one time range of the video. With a
+    motion_threshold, sampled frames without motion skip the model and are
+    counted in frames_sampled but not in frames_analyzed.
+
+    With roi=True, once the ball is found its next position is predicted from
+    the recent detections and only a roi_size full-resolution window around
+    it is inferred; frames where that finds nothing above roi_min_conf fall
+    back to the full crop. Tracked frames are inferred one at a time, so
+    batching only applies while searching.
+
+    With tiles=True the full search runs on overlapping tile_size tiles of
+    the full-resolution crop band instead of the `scale`-downscaled crop.
+
+    backend selects the .pt weights or a cached ONNX / OpenVINO export of
+    them (see export_model); ignored when a model is passed in.
+
+    With a cache_dir, raw per-frame detections are kept on disk keyed by the
+    video and model contents and every parameter that changes them (scale,
+    crop, conf, search mode). A rerun only decodes and infers frames missing
+    from the cache; when nothing is missing the statistics are rebuilt from
+    the cache without decoding. model_path must name the weights behind a
+    passed-in model for the key to be right.
+
+    With a stream_path, detections are appended to that JSONL file instead of
+    being kept in results['detections'] (memory stays flat), and a checkpoint
+    is written every CHECKPOINT_EVERY sampled frames. Rerunning the same
+    call resumes after the last checkpoint.
+
+    With profile=True (or DETECTOR_PROFILE=1 in the environment when profile
+    is None) results['profile'] holds p50/p95/p99 latencies of every stage
+    and counters (model calls, grabs, ...); trace_path additionally writes a
+    Chrome trace of all timed spans. profile_path runs the decode/inference
+    loop under cProfile and dumps the stats there.
+    """
+    if profile is None:
+        profile = os.environ.get(PROFILE_ENV, '') not in ('', '0')
+
+    if model is None:
+        model = load_model(model_path, backend, int8)
+        if model is None:
+            return {'error': 'Model not found'}
+
+    batch_size = max(1, batch_size)
 
     cap = cv2.VideoCapture(video_path)
     if not cap.isOpened():
@@ -27,81 +832,313 @@ def validate_ball_presence(video_path, model_path=DEFAULT_MODEL_PATH, sample_rat
 
     total_frames = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
     fps = int(cap.get(cv2.CAP_PROP_FPS))
+    frame_shape = (int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT)), int(cap.get(cv2.CAP_PROP_FRAME_WIDTH)))
+
+    cache = None
+    cached = {}
+    if cache_dir is not None:
+        cache = DetectionCache(cache_dir, {
+            'video': video_content_hash(video_path, cache_dir),
+            'model': file_sha256(model_path),
+            'backend': backend,
+            'int8': int8,
+            'scale': scale,
+            'crop': [CROP_TOP, CROP_BOTTOM],
+            'conf': conf,
+            'tiles': [tile_size, tile_overlap] if tiles else None,
+            # ROI detections depend on the track history, which depends on the sampled frames
+            'roi': [roi_size, roi_min_conf, ROI_MAX_GAP, sample_rate] if roi else None,
+            'bbox': 'frame'  # entries from before bboxes moved to frame pixels get a new key
+        })
+        cached = cache.load()
+
+    stream = None
+    resumed = None
+    if stream_path is not None:
+        stream = DetectionStream(stream_path, {
+            'video': os.path.abspath(video_path),
+            'video_size': os.path.getsize(video_path),
+            'model': os.path.abspath(model_path),
+            'backend': backend,
+            'int8': int8,
+            'sample_rate': sample_rate,
+            'scale': scale,
+            'conf': conf,
+            'range': [start_frame, end_frame],
+            'motion': motion_threshold,
+            'roi': [roi_size, roi_min_conf] if roi else None,
+            'tiles': [tile_size, tile_overlap] if tiles else None,
+            'low_conf': low_conf_threshold,  # the checkpointed low-confidence count depends on it
+            'bbox': 'frame'
+        })
+        resumed = stream.resume()
+        if resumed is not None:
+            start_frame = max(start_frame, resumed['last_frame'])
+            if verbose:
+                print(f"↻ Resuming {stream_path} after frame {start_frame}")
 
     results = {
         'total_frames': total_frames,
+        'frames_sampled': 0,
         'frames_analyzed': 0,
         'frames_with_ball': 0,
         'detections': [],
         'detection_rate': 0,
         'processing_time': 0,
         'avg_confidence': 0,
-        'low_conf_detections': 0
+        'low_conf_detections': 0,
+        'sampler': resolve_sampler(sampler, sample_rate),
+        'batch_size': batch_size,
+        'search': f"tiles {tile_size}px/{tile_overlap:.0%}" if tiles else f"scaled {scale}",
+        'decode_time': 0,
+        'preprocess_time': 0,
+        'inference_time': 0,
+        'inferences_skipped': 0,
+        'cached_frames': 0
     }
 
+    profiler = cProfile.Profile() if profile_path is not None else None
+    if profiler is not None:
+        profiler.enable()
+
     start_time = time.time()
-    frame_idx = 0
+    timings = StageTimer(('decode', 'preprocess', 'motion', 'inference', 'postprocess'),
+                         enabled=profile or trace_path is not None, trace=trace_path is not None)
+    pipeline_stats = {}
+    gate = MotionGate(motion_threshold, motion_max_skip) if motion_threshold is not None else None
+    track = BallTrack(ROI_MAX_GAP * sample_rate) if roi else None
+    roi_stats = {'roi_inferences': 0, 'roi_detections': 0, 'full_frame_fallbacks': 0}
     confidence_sum = 0
+    batch = []
 
-    while True:
-        ret, frame = cap.read()
-        if not ret:
-            break
+    counter_keys = ('frames_sampled', 'frames_analyzed', 'frames_with_ball', 'low_conf_detections',
+                    'cached_frames')
+    if resumed is not None:
+        results.update({key: resumed['counters'][key] for key in counter_keys})
+        confidence_sum = resumed['counters']['confidence_sum']
+        if gate is not None:
+            gate.skipped = resumed['counters']['inferences_skipped']
 
-        frame_idx += 1
+    def stream_counters():
+        counters = {key: results[key] for key in counter_keys}
+        counters['confidence_sum'] = confidence_sum
+        counters['inferences_skipped'] = gate.skipped if gate is not None else 0
+        return counters
 
-        if frame_idx % sample_rate != 0:
-            continue
+    def record_detection(best_detection):
+        nonlocal confidence_sum
+        results['frames_with_ball'] += 1
+        if stream is not None:
+            stream.write(best_detection)
+        else:
+            results['detections'].append(best_detection)
+        confidence_sum += best_detection['confidence']
 
-        results['frames_analyzed'] += 1
+        if best_detection['confidence'] < low_conf_threshold:
+            results['low_conf_detections'] += 1
 
-        h, w = frame.shape[:2]
-        frame_small = cv2.resize(frame, (int(w * scale), int(h * scale)))
-        crop_h = frame_small.shape[0]
-        frame_crop = frame_small[int(crop_h * 0.25):int(crop_h * 0.92), :]
-        frame_enhanced = cv2.GaussianBlur(frame_crop, (3, 3), 0)
+        if track is not None:
+            x1, y1, x2, y2 = best_detection['bbox']
+            track.update(best_detection['frame'], ((x1 + x2) / 2, (y1 + y2) / 2))
 
-        preds = model(frame_enhanced, conf=conf, verbose=False, classes=[32], iou=0.4)
+    def full_search(entries):
+        if tiles:
+            return detect_tiled(model, [(idx, full) for idx, full, _ in entries], conf, fps, timings,
+                                tile_size, tile_overlap)
+        return detect_batch(model, [(idx, small) for idx, _, small in entries], conf, fps, timings,
+                            frame_shape, scale)
 
-        best_detection = None
-        max_conf = 0
+    def finish_frame(frame_idx, best_detection):
+        if cache is not None:
+            cache.store(frame_idx, best_detection)
+        if best_detection:
+            record_detection(best_detection)
 
-        for pred in preds:
-            for box in pred.boxes:
-                if model.names[int(box.cls[0])] == 'sports ball':
-                    current_conf = float(box.conf[0])
+    def flush_batch():
+        for (frame_idx, _, _), best_detection in zip(batch, full_search(batch)):
+            finish_frame(frame_idx, best_detection)
+        batch.clear()
 
-                    if current_conf > max_conf:
-                        max_conf = current_conf
-                        best_detection = {
-                            'frame': frame_idx,
-                            'time': frame_idx / fps,
-                            'confidence': current_conf,
-                            'bbox': box.xyxy[0].cpu().numpy().tolist()
-                        }
+    def detect_tracked(frame_idx, frame, crop, center):
+        roi_stats['roi_inferences'] += 1
+        found = detect_roi(model, frame, center, roi_size, conf, timings)
+        if found is not None and found[0] >= roi_min_conf:
+            roi_stats['roi_detections'] += 1
+            return {
+                'frame': frame_idx,
+                'time': frame_idx / fps,
+                'confidence': found[0],
+                'bbox': found[1],
+                'source': 'roi'
+            }
 
-        if best_detection:
-            results['frames_with_ball'] += 1
-            results['detections'].append(best_detection)
-            confidence_sum += max_conf
+        roi_stats['full_frame_fallbacks'] += 1
+        best_detection = full_search([(frame_idx, frame, crop)])[0]
+        if found is not None and (best_detection is None or found[0] > best_detection['confidence']):
+            best_detection = {
+                'frame': frame_idx,
+                'time': frame_idx / fps,
+                'confidence': found[0],
+                'bbox': found[1],
+                'source': 'roi'
+            }
+        return best_detection
+
+    # Frames up to the first one missing from the cache are served without
+    # decoding; decoding resumes right before it and skips later cached frames
+    decode_from = start_frame
+    cached_prefix = []
+    if cached:
+        limit = end_frame if end_frame is not None else total_frames
+        wanted = range(start_frame + sample_rate - start_frame % sample_rate, limit + 1, sample_rate)
+        first_missing = next((f for f in wanted if f not in cached), limit + 1)
+        cached_prefix = [(f, None, None) for f in wanted if f < first_missing]
+        decode_from = max(start_frame, first_missing - 1)
 
-            if max_conf < 0.1:
-                results['low_conf_detections'] += 1
+    if workers > 0:
+        source = iter_pipelined_frames(cap, sample_rate, scale, sampler, timings,
+                                       frame_range=(decode_from, end_frame), skip=frozenset(cached),
+                                       workers=workers, queue_size=queue_size, stats=pipeline_stats)
+    else:
+        source = iter_preprocessed_frames(cap, sample_rate, scale, sampler, timings,
+                                          frame_range=(decode_from, end_frame), skip=frozenset(cached))
 
-        if results['frames_analyzed'] % 100 == 0:
-            print(f"\rProgress: {frame_idx}/{total_frames} | Detections: {results['frames_with_ball']}", end='')
+    def with_cached_prefix():
+        yield from cached_prefix
+        yield from source
+
+    frames = with_cached_prefix()
+    last_checkpoint = results['frames_sampled']
+    last_frame = start_frame
+
+    try:
+        for frame_idx, frame, crop in frames:
+            # Checkpoint only when no frame is pending in the batch, so every
+            # frame up to last_frame has its detection on disk
+            if (stream is not None and not batch
+                    and results['frames_sampled'] - last_checkpoint >= CHECKPOINT_EVERY):
+                stream.checkpoint(last_frame, stream_counters())
+                last_checkpoint = results['frames_sampled']
+
+            last_frame = frame_idx
+            results['frames_sampled'] += 1
+
+            if frame is None:
+                # Served from the detection cache
+                if batch:
+                    flush_batch()
+                results['frames_analyzed'] += 1
+                results['cached_frames'] += 1
+                if cached[frame_idx]:
+                    record_detection(cached[frame_idx])
+                continue
+
+            if gate is not None:
+                t0 = time.perf_counter()
+                passed = gate.should_infer(crop)
+                timings.add('motion', time.perf_counter() - t0)
+                if not passed:
+                    continue
+
+            results['frames_analyzed'] += 1
+
+            center = track.predict(frame_idx) if track is not None else None
+            if center is not None:
+                if batch:
+                    flush_batch()
+                finish_frame(frame_idx, detect_tracked(frame_idx, frame, crop, center))
+            else:
+                batch.append((frame_idx, frame, crop))
+                if len(batch) >= batch_size:
+                    flush_batch()
+
+            if verbose and results['frames_analyzed'] % 100 == 0:
+                print(f"\rProgress: {frame_idx}/{total_frames} | Detections: {results['frames_with_ball']}", end='')
+
+        if batch:
+            flush_batch()
+
+        if stream is not None:
+            stream.checkpoint(last_frame, stream_counters(), complete=True)
+    finally:
+        frames.close()
+        if cache is not None:
+            cache.close()
+        if stream is not None:
+            stream.close()
+        if profiler is not None:
+            profiler.disable()
 
     cap.release()
 
     results['processing_time'] = time.time() - start_time
+    results['decode_time'] = timings['decode']
+    results['preprocess_time'] = timings['preprocess']
+    results['inference_time'] = timings['inference']
+    results['postprocess_time'] = timings['postprocess']
+    if gate is not None:
+        results['inferences_skipped'] = gate.skipped
+        results['motion'] = motion_report(results, timings['motion'], motion_threshold)
+    if track is not None:
+        results['roi'] = roi_stats
+    if workers > 0:
+        results['pipeline'] = pipeline_report(results, pipeline_stats, workers, queue_size)
     results['detection_rate'] = (results['frames_with_ball'] / results['frames_analyzed'] * 100
                                  if results['frames_analyzed'] > 0 else 0)
     results['avg_confidence'] = (confidence_sum / results['frames_with_ball']
                                 if results['frames_with_ball'] > 0 else 0)
+    if stream is not None:
+        results['stream_path'] = stream_path
+        results['resumed_from'] = resumed['last_frame'] if resumed is not None else None
+    if timings.enabled:
+        results['profile'] = timings.report()
+    if trace_path is not None:
+        timings.write_trace(trace_path)
+        results['trace_path'] = trace_path
+    if profiler is not None:
+        os.makedirs(os.path.dirname(profile_path) or '.', exist_ok=True)
+        profiler.dump_stats(profile_path)
+        results['profile_path'] = profile_path
 
     return results
 
 
+def motion_report(results, gate_time, threshold):
+    """Skipped inferences and the speedup over an ungated run, estimated by
+    charging every skipped frame the measured mean inference time."""
+    analyzed = results['frames_analyzed']
+    per_inference = results['inference_time'] / analyzed if analyzed > 0 else 0
+    saved = results['inferences_skipped'] * per_inference - gate_time
+    elapsed = results['processing_time']
+
+    return {
+        'threshold': threshold,
+        'skipped_pct': (results['inferences_skipped'] / results['frames_sampled'] * 100
+                        if results['frames_sampled'] > 0 else 0),
+        'gate_time': gate_time,
+        'estimated_speedup': (elapsed + saved) / elapsed if elapsed > 0 else 1
+    }
+
+
+def pipeline_report(results, stats, workers, queue_size):
+    """Per-stage throughput (frames per busy second) and queue depth for the
+    threaded pipeline. Preprocess throughput is summed over all workers."""
+
+    def rate(frames, busy):
+        return frames / busy if busy > 0 else 0
+
+    return {
+        'workers': workers,
+        'queue_size': queue_size,
+        'decode_fps': rate(results['frames_sampled'], results['decode_time']),
+        'preprocess_fps': rate(results['frames_sampled'], results['preprocess_time'] / workers),
+        'inference_fps': rate(results['frames_analyzed'], results['inference_time']),
+        'avg_queue_depth': stats['queue_depth_sum'] / stats['gets'] if stats.get('gets') else 0,
+        'max_queue_depth': stats.get('queue_depth_max', 0),
+        'consumer_stalls': stats.get('consumer_stalls', 0)
+    }
+
+
 def print_report(results):
     if 'error' in results:
         print(f"\n✗ Error: {results['error']}")
@@ -110,36 +1147,157 @@ def print_report(results):
     print("\n" + "=" * 50)
     print("VALIDATION REPORT")
     print("=" * 50)
+    print(f"Frames sampled:    {results['frames_sampled']}")
     print(f"Frames analyzed:   {results['frames_analyzed']}")
     print(f"Frames with ball:  {results['frames_with_ball']}")
     print(f"Detection rate:    {results['detection_rate']:.1f}%")
+    print(f"Search:            {results['search']}")
     print(f"Processing time:   {results['processing_time']:.1f}s")
-    print(f"Speed:             {results['frames_analyzed'] / results['processing_time']:.1f} fps")
+    print(f"Speed:             {results['frames_sampled'] / results['processing_time']:.1f} fps")
+    print(f"Decode time:       {results['decode_time']:.1f}s ({results['sampler']})")
+    print(f"Preprocess time:   {results['preprocess_time']:.1f}s")
+    print(f"Inference time:    {results['inference_time']:.1f}s (batch size {results['batch_size']})")
+    print(f"Postprocess time:  {results['postprocess_time']:.1f}s")
+    if 'motion' in results:
+        motion = results['motion']
+        print(f"Motion gate:       skipped {results['inferences_skipped']} inferences "
+              f"({motion['skipped_pct']:.1f}%) | ~{motion['estimated_speedup']:.2f}x vs ungated")
+    if results.get('stream_path'):
+        resumed = (f" (resumed after frame {results['resumed_from']})"
+                   if results['resumed_from'] is not None else "")
+        print(f"Detections:        {results['stream_path']}{resumed}")
+    if results.get('cached_frames'):
+        print(f"Cache:             {results['cached_frames']}/{results['frames_analyzed']} frames from cache")
+    if 'roi' in results:
+        roi = results['roi']
+        print(f"ROI tracking:      {roi['roi_detections']}/{roi['roi_inferences']} found in window | "
+              f"{roi['full_frame_fallbacks']} full-frame fallbacks")
+    if 'pipeline' in results:
+        pipeline = results['pipeline']
+        print(f"Pipeline:          {pipeline['workers']} workers | queue {pipeline['queue_size']}")
+        print(f"  Stage fps:       decode {pipeline['decode_fps']:.1f} | "
+              f"preprocess {pipeline['preprocess_fps']:.1f} | inference {pipeline['inference_fps']:.1f}")
+        print(f"  Queue depth:     avg {pipeline['avg_queue_depth']:.1f} | max {pipeline['max_queue_depth']} | "
+              f"stalls {pipeline['consumer_stalls']}")
+    if 'profile' in results:
+        profile_report(results)
     print("=" * 50)
 
 
+def profile_report(results):
+    """Stage latency table, counters and the top cProfile entries"""
+    profile = results['profile']
+    print("-" * 50)
+    print(f"{'Stage (ms)':<18}{'n':>7}{'p50':>8}{'p95':>8}{'p99':>8}")
+    for stage, row in profile['stages'].items():
+        print(f"{stage:<18}{row['count']:>7}{row['p50_ms']:>8.2f}{row['p95_ms']:>8.2f}{row['p99_ms']:>8.2f}")
+    if profile['counters']:
+        print("Counters:          " + " | ".join(f"{name} {value}" for name, value in profile['counters'].items()))
+    if results.get('trace_path'):
+        print(f"Trace:             {results['trace_path']}")
+    if results.get('profile_path'):
+        print(f"cProfile:          {results['profile_path']}")
+        pstats.Stats(results['profile_path']).sort_stats('cumulative').print_stats(10)
+
+
 def main():
+    parser = argparse.ArgumentParser(
+        description="YOLO ball detector",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="Examples:\n"
+               "  python detector.py videos/match.mp4\n"
+               "  python detector.py videos/match.mp4 models/yolov8x.pt\n"
+               "  python detector.py videos/match.mp4 models/yolov8n.pt 5\n"
+               "  python detector.py videos/match.mp4 models/yolov8n.pt 250 seek\n"
+               "  python detector.py videos/match.mp4 --batch-size 8\n"
+               "  python detector.py videos/match.mp4 --batch-size 8 --workers 4\n"
+               "  python detector.py videos/match.mp4 --motion-threshold 0.01\n"
+               "  python detector.py videos/match.mp4 --roi\n"
+               "  python detector.py videos/match.mp4 --tiles --tile-size 640 --tile-overlap 0.2\n"
+               "  python detector.py videos/match.mp4 --backend onnx --batch-size 8\n"
+               "  python detector.py videos/match.mp4 --cache\n"
+               "  python detector.py videos/match.mp4 --stream detections/match.jsonl\n"
+               "  python detector.py videos/match.mp4 --profile --trace trace.json")
+    parser.add_argument('video_path')
+    parser.add_argument('model_path', nargs='?', default=DEFAULT_MODEL_PATH)
+    parser.add_argument('sample_rate', nargs='?', type=int, default=DEFAULT_SAMPLE_RATE)
+    parser.add_argument('sampler', nargs='?', choices=SAMPLERS, default=DEFAULT_SAMPLER)
+    parser.add_argument('--batch-size', type=int, default=DEFAULT_BATCH_SIZE,
+                        help="frames per model call (default: %(default)s)")
+    parser.add_argument('--workers', type=int, default=DEFAULT_WORKERS,
+                        help="preprocess threads; >0 enables the threaded decode/preprocess/infer "
+                             "pipeline (default: %(default)s, serial)")
+    parser.add_argument('--queue-size', type=int, default=DEFAULT_QUEUE_SIZE,
+                        help="max frames in flight in the pipeline (default: %(default)s)")
+    parser.add_argument('--motion-threshold', type=float, default=DEFAULT_MOTION_THRESHOLD,
+                        help="skip inference when less than this fraction of pixels changed "
+                             "(e.g. 0.01; default: off)")
+    parser.add_argument('--motion-max-skip', type=int, default=DEFAULT_MOTION_MAX_SKIP,
+                        help="infer at least once every N sampled frames when gated (default: %(default)s)")
+    parser.add_argument('--roi', action='store_true',
+                        help="after a detection, infer only a full-resolution window around the "
+                             "predicted ball position")
+    parser.add_argument('--roi-size', type=int, default=DEFAULT_ROI_SIZE,
+                        help="window size in pixels (default: %(default)s)")
+    parser.add_argument('--roi-min-conf', type=float, default=DEFAULT_ROI_MIN_CONF,
+                        help="fall back to the full frame below this confidence (default: %(default)s)")
+    parser.add_argument('--tiles', action='store_true',
+                        help="search overlapping full-resolution tiles instead of the downscaled crop")
+    parser.add_argument('--tile-size', type=int, default=DEFAULT_TILE_SIZE,
+                        help="tile size in pixels, multiple of 32 (default: %(default)s)")
+    parser.add_argument('--tile-overlap', type=float, default=DEFAULT_TILE_OVERLAP,
+                        help="fraction of overlap between tiles (default: %(default)s)")
+    parser.add_argument('--backend', choices=BACKENDS, default=DEFAULT_BACKEND,
+                        help="inference backend; onnx/openvino are exported once and cached "
+                             "(default: %(default)s)")
+    parser.add_argument('--int8', action='store_true',
+                        help="int8-quantize the exported model (openvino)")
+    parser.add_argument('--cache', action='store_true',
+                        help="reuse per-frame detections from earlier runs with the same video, "
+                             "model and parameters")
+    parser.add_argument('--cache-dir', default=DEFAULT_CACHE_DIR,
+                        help="detection cache directory (default: %(default)s)")
+    parser.add_argument('--stream', metavar='PATH',
+                        help="append detections to this JSONL file with checkpoints; rerun the "
+                             "same command to resume after a crash")
+    parser.add_argument('--low-conf', type=float, default=LOW_CONF_THRESHOLD,
+                        help="confidence below which a detection counts as low "
+                             "(default: %(default)s)")
+
+    parser.add_argument('--profile', action='store_true', default=None,
+                        help=f"report p50/p95/p99 per-stage latencies and counters (or set {PROFILE_ENV}=1)")
+    parser.add_argument('--profile-out', metavar='PATH',
+                        help="run under cProfile and write the stats to PATH")
+    parser.add_argument('--trace', metavar='PATH',
+                        help="write a Chrome trace (chrome://tracing, Perfetto) of every timed stage")
+
     if len(sys.argv) < 2:
-        print("Usage: python detector.py <video_path> [model_path] [sample_rate]")
-        print("\nExamples:")
-        print("  python detector.py videos/match.mp4")
-        print("  python detector.py videos/match.mp4 models/yolov8x.pt")
-        print("  python detector.py videos/match.mp4 models/yolov8n.pt 5")
+        parser.print_help()
         sys.exit(1)
 
-    video_path = sys.argv[1]
-    model_path = sys.argv[2] if len(sys.argv) > 2 else DEFAULT_MODEL_PATH
-    sample_rate = int(sys.argv[3]) if len(sys.argv) > 3 else DEFAULT_SAMPLE_RATE
+    args = parser.parse_args()
 
-    if not os.path.exists(video_path):
-        print(f"✗ Video not found: {video_path}")
+    if not os.path.exists(args.video_path):
+        print(f"✗ Video not found: {args.video_path}")
         sys.exit(1)
 
-    print(f"\nRunning detection on: {video_path}")
-    print(f"Model: {model_path}")
-    print(f"Sample rate: {sample_rate}\n")
+    print(f"\nRunning detection on: {args.video_path}")
+    print(f"Model: {args.model_path} ({args.backend}{', int8' if args.int8 else ''})")
+    print(f"Sample rate: {args.sample_rate} | Sampler: {args.sampler} | Batch size: {args.batch_size}")
+    print(f"Workers: {args.workers or 'serial'}\n")
 
-    results = validate_ball_presence(video_path, model_path=model_path, sample_rate=sample_rate)
+    results = validate_ball_presence(args.video_path, model_path=args.model_path,
+                                     sample_rate=args.sample_rate, sampler=args.sampler,
+                                     batch_size=args.batch_size, workers=args.workers,
+                                     queue_size=args.queue_size, motion_threshold=args.motion_threshold,
+                                     motion_max_skip=args.motion_max_skip, roi=args.roi,
+                                     roi_size=args.roi_size, roi_min_conf=args.roi_min_conf,
+                                     tiles=args.tiles, tile_size=args.tile_size, tile_overlap=args.tile_overlap,
+                                     backend=args.backend, int8=args.int8,
+                                     cache_dir=args.cache_dir if args.cache else None,
+                                     low_conf_threshold=args.low_conf, stream_path=args.stream,
+                                     profile=args.profile, profile_path=args.profile_out,
+                                     trace_path=args.trace)
     print_report(results)
 
 
@@ -0,0 +1,116 @@
+#!/usr/bin/env python3
+"""Background detector pass that feeds candidate ball positions to the annotator"""
+
+import json
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+DETECTOR_SCRIPT = str(Path(__file__).resolve().parent / "detector.py")
+
+
+class PreAnnotator:
+    """Runs detector.py over every frame in a subprocess and reads its
+    detections back as they are written.
+
+    The detector streams to a JSONL file with checkpoints (see
+    DetectionStream), so stopping the annotator mid-pass loses nothing: the
+    next session resumes the pass, and a finished pass is never rerun.
+    Candidates are keyed by 0-based frame id (the annotator's), with centers
+    in original-frame pixels.
+    """
+
+    def __init__(self, video_path, stream_path, model_path, roi=True):
+        self.video_path = video_path
+        self.stream_path = stream_path
+        self.model_path = model_path
+        self.roi = roi
+        self.log_path = stream_path + ".log"
+        self.candidates = {}  # frame_id -> (x, y, confidence)
+        self.progress = 0  # last frame the detector has fully processed (1-based), as of the last poll()
+        self._offset = 0
+        self._tail = b""  # last line read, to notice when the detector rewrites the stream
+        self._proc = None
+        self._log = None
+
+    def checkpoint(self):
+        try:
+            with open(self.stream_path + ".ckpt", 'r') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def complete(self):
+        state = self.checkpoint()
+        return state is not None and state.get('complete', False)
+
+    def start(self):
+        """Launch the detector unless a finished pass is already on disk"""
+        if self.complete():
+            return False
+        os.makedirs(os.path.dirname(os.path.abspath(self.stream_path)), exist_ok=True)
+        cmd = [sys.executable, DETECTOR_SCRIPT, self.video_path, self.model_path, '1',
+               '--stream', self.stream_path]
+        if self.roi:
+            cmd.append('--roi')
+        self._log = open(self.log_path, 'w')
+        self._proc = subprocess.Popen(cmd, stdout=self._log, stderr=subprocess.STDOUT)
+        return True
+
+    def running(self):
+        return self._proc is not None and self._proc.poll() is None
+
+    def failed(self):
+        return self._proc is not None and self._proc.poll() not in (None, 0)
+
+    def poll(self):
+        """Read detections appended since the last call and refresh
+        `progress` from the checkpoint; returns how many detections.
+
+        The detector rewrites the stream's tail when it resumes from its
+        checkpoint (and all of it on a different run), possibly with other
+        detections. The last line read is kept and compared with the file
+        on every poll; when it no longer matches, the candidates are read
+        again from the start."""
+        state = self.checkpoint()
+        self.progress = state['last_frame'] if state else 0
+        try:
+            f = open(self.stream_path, 'rb')
+        except OSError:
+            return 0
+
+        with f:
+            size = os.fstat(f.fileno()).st_size
+            f.seek(self._offset - len(self._tail))
+            if size < self._offset or f.read(len(self._tail)) != self._tail:
+                self.candidates = {}
+                self._offset = 0
+                self._tail = b""
+                f.seek(0)
+            data = f.read(size - self._offset)
+        end = data.rfind(b"\n") + 1  # leave a half-written last line for later
+        if end == 0:
+            return 0
+        self._offset += end
+        self._tail = data[data.rfind(b"\n", 0, end - 1) + 1:end]
+
+        added = 0
+        for line in data[:end].splitlines():
+            try:
+                det = json.loads(line)
+                x1, y1, x2, y2 = det['bbox']
+                self.candidates[det['frame'] - 1] = ((x1 + x2) / 2, (y1 + y2) / 2, det['confidence'])
+            except (ValueError, KeyError):
+                continue  # a damaged line costs one candidate, not the session
+            added += 1
+        return added
+
+    def close(self):
+        if self.running():
+            self._proc.terminate()
+            self._proc.wait()
+        self._proc = None
+        if self._log is not None:
+            self._log.close()
+            self._log = None
@@ -0,0 +1,186 @@
+#!/usr/bin/env python3
+"""Benchmark detector search modes and backends"""
+
+import argparse
+import json
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from motion_detector.detector import (BACKENDS, DEFAULT_MODEL_PATH, DEFAULT_SAMPLE_RATE, DEFAULT_SCALE,
+                                      load_model, validate_ball_presence)
+
+BBOX_TOLERANCE = 5.0  # original-frame pixels (~2 px in the 0.4-scaled crop)
+CONF_TOLERANCE = 0.02
+
+
+def parse_tile_config(value):
+    """'640' or '640:0.25' -> (tile_size, overlap)"""
+    size, _, overlap = value.partition(':')
+    return int(size), float(overlap) if overlap else 0.2
+
+
+def compare_search_modes(video_path, model_path=DEFAULT_MODEL_PATH, sample_rate=DEFAULT_SAMPLE_RATE,
+                         scale=DEFAULT_SCALE, tile_configs=((640, 0.2),), batch_size=1):
+    """
+    Run the downscaled-crop search and each tiled configuration on the same video
+
+    Args:
+        video_path: Video to benchmark
+        model_path: YOLO weights, loaded once for all runs
+        sample_rate: Analyze every Nth frame
+        scale: Downscale factor of the baseline run
+        tile_configs: (tile_size, overlap) pairs for the tiled runs
+        batch_size: Frames per model call
+    """
+    model = load_model(model_path)
+    if model is None:
+        return None
+
+    runs = [('scaled', {'scale': scale})]
+    runs += [(f"tiles {size}/{overlap:.0%}", {'tiles': True, 'tile_size': size, 'tile_overlap': overlap})
+             for size, overlap in tile_configs]
+
+    rows = []
+    for name, options in runs:
+        print(f"→ {name}")
+        results = validate_ball_presence(video_path, model=model, sample_rate=sample_rate,
+                                         batch_size=batch_size, verbose=False, **options)
+        if 'error' in results:
+            print(f"✗ {results['error']}")
+            return None
+
+        rows.append({
+            'mode': name,
+            'options': options,
+            'frames_analyzed': results['frames_analyzed'],
+            'detection_rate': results['detection_rate'],
+            'avg_confidence': results['avg_confidence'],
+            'processing_time': results['processing_time'],
+            'inference_time': results['inference_time'],
+            'fps': results['frames_sampled'] / results['processing_time'] if results['processing_time'] else 0
+        })
+
+    baseline = rows[0]
+    for row in rows:
+        row['slowdown'] = baseline['fps'] / row['fps'] if row['fps'] else 0
+        row['detection_gain'] = row['detection_rate'] - baseline['detection_rate']
+
+    return rows
+
+
+def compare_backends(video_path, model_path=DEFAULT_MODEL_PATH, backends=("onnx",),
+                     sample_rate=DEFAULT_SAMPLE_RATE, batch_size=1, int8=False):
+    """
+    Run the .pt model and each exported backend and check the detections agree
+
+    Args:
+        video_path: Video to benchmark
+        model_path: Source .pt weights
+        backends: Exported backends to compare against 'pt'
+        sample_rate: Analyze every Nth frame
+        batch_size: Frames per model call
+        int8: Compare int8-quantized exports
+    """
+    rows = []
+    reference = None
+
+    for backend in ("pt",) + tuple(b for b in backends if b != "pt"):
+        print(f"→ {backend}")
+        model = load_model(model_path, backend, int8)
+        if model is None:
+            return None
+
+        results = validate_ball_presence(video_path, model=model, sample_rate=sample_rate,
+                                         batch_size=batch_size, verbose=False)
+        if 'error' in results:
+            print(f"✗ {results['error']}")
+            return None
+
+        by_frame = {det['frame']: det for det in results['detections']}
+        if reference is None:
+            reference = by_frame
+
+        frames = set(reference) | set(by_frame)
+        common = set(reference) & set(by_frame)
+        bbox_diff = max((max(abs(a - b) for a, b in zip(reference[f]['bbox'], by_frame[f]['bbox']))
+                         for f in common), default=0)
+        conf_diff = max((abs(reference[f]['confidence'] - by_frame[f]['confidence']) for f in common),
+                        default=0)
+
+        rows.append({
+            'mode': backend,
+            'detection_rate': results['detection_rate'],
+            'inference_time': results['inference_time'],
+            'fps': results['frames_sampled'] / results['processing_time'] if results['processing_time'] else 0,
+            'presence_mismatches': len(frames) - len(common),
+            'max_bbox_diff': bbox_diff,
+            'max_conf_diff': conf_diff,
+            'within_tolerance': (len(frames) == len(common) and bbox_diff <= BBOX_TOLERANCE
+                                 and conf_diff <= CONF_TOLERANCE)
+        })
+
+    return rows
+
+
+def print_backend_comparison(rows):
+    print(f"\n{'='*78}")
+    print(f"{'Backend':<12}{'fps':>9}{'speedup':>9}{'det. rate':>11}{'mismatch':>10}{'bbox Δ':>9}{'conf Δ':>9}")
+    print(f"{'-'*78}")
+    for row in rows:
+        speedup = row['fps'] / rows[0]['fps'] if rows[0]['fps'] else 0
+        status = "✓" if row['within_tolerance'] else "✗"
+        print(f"{row['mode']:<12}{row['fps']:>9.1f}{speedup:>8.2f}x{row['detection_rate']:>10.1f}%"
+              f"{row['presence_mismatches']:>10}{row['max_bbox_diff']:>9.2f}{row['max_conf_diff']:>9.3f} {status}")
+    print(f"{'='*78}\n")
+
+
+def print_comparison(rows):
+    print(f"\n{'='*78}")
+    print(f"{'Mode':<18}{'fps':>9}{'slowdown':>10}{'det. rate':>11}{'gain':>9}{'avg conf':>10}")
+    print(f"{'-'*78}")
+    for row in rows:
+        print(f"{row['mode']:<18}{row['fps']:>9.1f}{row['slowdown']:>9.2f}x{row['detection_rate']:>10.1f}%"
+              f"{row['detection_gain']:>+8.1f}%{row['avg_confidence']:>10.3f}")
+    print(f"{'='*78}\n")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare downscaled vs tiled detector search, "
+                                                 "or the .pt model vs exported backends")
+    parser.add_argument('video_path')
+    parser.add_argument('--model', default=DEFAULT_MODEL_PATH)
+    parser.add_argument('--sample-rate', type=int, default=DEFAULT_SAMPLE_RATE)
+    parser.add_argument('--scale', type=float, default=DEFAULT_SCALE)
+    parser.add_argument('--batch-size', type=int, default=1)
+    parser.add_argument('--tiles', nargs='+', type=parse_tile_config, default=[(640, 0.2)],
+                        metavar='SIZE[:OVERLAP]', help="tile configurations (default: 640:0.2)")
+    parser.add_argument('--backends', nargs='+', choices=BACKENDS,
+                        help="compare these backends against the .pt model instead of search modes")
+    parser.add_argument('--int8', action='store_true')
+    parser.add_argument('--output', help="write the comparison as JSON")
+    args = parser.parse_args()
+
+    if args.backends:
+        rows = compare_backends(args.video_path, model_path=args.model, backends=args.backends,
+                                sample_rate=args.sample_rate, batch_size=args.batch_size, int8=args.int8)
+    else:
+        rows = compare_search_modes(args.video_path, model_path=args.model, sample_rate=args.sample_rate,
+                                    scale=args.scale, tile_configs=args.tiles, batch_size=args.batch_size)
+    if rows is None:
+        sys.exit(1)
+
+    if args.backends:
+        print_backend_comparison(rows)
+    else:
+        print_comparison(rows)
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(rows, f, indent=2)
+        print(f"✓ Saved: {args.output}")
+
+
+if __name__ == "__main__":
+    main()
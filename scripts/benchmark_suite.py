@@ -0,0 +1,263 @@
+#!/usr/bin/env python3
+"""Detector benchmark suite on synthetic videos with known ball positions"""
+
+import argparse
+import itertools
+import json
+import os
+import platform
+import resource
+import subprocess
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import get_context
+from pathlib import Path
+
+import cv2
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from motion_detector.detector import (BACKENDS, CROP_BOTTOM, CROP_TOP, DEFAULT_MODEL_PATH,
+                                      validate_ball_presence)
+
+DEFAULT_VIDEO_DIR = "cache/benchmark"
+DEFAULT_OUTPUT = "benchmark_results.json"
+BALL_RADIUS = 9
+MATCH_TOLERANCE = 2.0  # a detection matches when its center is within this many radii of the truth
+
+
+def make_synthetic_video(video_dir, width=1280, height=720, frames=900, fps=30, seed=0):
+    """
+    Render a moving ball on a textured pitch-like background (cached by parameters)
+
+    Args:
+        video_dir: Folder for generated videos and their ground truth
+        width, height: Resolution
+        frames: Number of frames
+        fps: Frame rate
+        seed: Random seed for texture and trajectory
+
+    Returns:
+        (video_path, ground_truth) where ground_truth maps the detector's
+        1-based frame index to the ball center (x, y)
+    """
+    name = f"synthetic_{width}x{height}_{frames}f_{fps}fps_s{seed}"
+    video_path = os.path.join(video_dir, f"{name}.mp4")
+    gt_path = os.path.join(video_dir, f"{name}.gt.json")
+
+    if os.path.exists(video_path) and os.path.exists(gt_path):
+        with open(gt_path, 'r') as f:
+            return video_path, {int(k): v for k, v in json.load(f).items()}
+
+    os.makedirs(video_dir, exist_ok=True)
+    rng = np.random.default_rng(seed)
+
+    # Grass stripes plus blurred noise, so frames are not trivially compressible
+    stripes = ((np.arange(width) // 80) % 2 * 25 + 70).astype(np.uint8)
+    background = np.zeros((height, width, 3), np.uint8)
+    background[:, :, 1] = stripes
+    noise = cv2.GaussianBlur(rng.integers(0, 60, (height, width), dtype=np.uint8), (5, 5), 0)
+    background = cv2.add(background, cv2.merge([noise // 3, noise, noise // 3]))
+
+    # Ball bounces inside the band the detector crops to
+    top, bottom = int(height * CROP_TOP) + BALL_RADIUS, int(height * CROP_BOTTOM) - BALL_RADIUS
+    x, y = float(rng.uniform(BALL_RADIUS, width - BALL_RADIUS)), float(rng.uniform(top, bottom))
+    vx, vy = rng.uniform(-12, 12), rng.uniform(-6, 6)
+
+    writer = cv2.VideoWriter(video_path, cv2.VideoWriter_fourcc(*'mp4v'), fps, (width, height))
+    ground_truth = {}
+
+    for i in range(frames):
+        frame = background.copy()
+        center = (int(round(x)), int(round(y)))
+        cv2.circle(frame, center, BALL_RADIUS, (245, 245, 245), -1)
+        cv2.circle(frame, center, BALL_RADIUS // 3, (30, 30, 30), -1)
+        writer.write(frame)
+        ground_truth[i + 1] = [x, y]
+
+        x, y = x + vx, y + vy
+        if not BALL_RADIUS <= x <= width - BALL_RADIUS:
+            vx = -vx
+        if not top <= y <= bottom:
+            vy = -vy
+
+    writer.release()
+    with open(gt_path, 'w') as f:
+        json.dump(ground_truth, f)
+
+    return video_path, ground_truth
+
+
+def score_detections(detections, ground_truth, sampled_frames):
+    """Recall over sampled frames and precision over detections"""
+    hits = 0
+    for det in detections:
+        x1, y1, x2, y2 = det['bbox']
+        gx, gy = ground_truth[det['frame']]
+        if np.hypot((x1 + x2) / 2 - gx, (y1 + y2) / 2 - gy) <= MATCH_TOLERANCE * BALL_RADIUS:
+            hits += 1
+
+    return {
+        'recall': hits / sampled_frames if sampled_frames else 0,
+        'precision': hits / len(detections) if detections else 0
+    }
+
+
+def _run_config(video_path, gt_path, model_path, config):
+    """Child-process entry: one detector run, so ru_maxrss is this run's peak"""
+    with open(gt_path, 'r') as f:
+        ground_truth = {int(k): v for k, v in json.load(f).items()}
+
+    results = validate_ball_presence(video_path, model_path=model_path, profile=True, verbose=False,
+                                     **config)
+    if 'error' in results:
+        return {'error': results['error']}
+
+    scores = score_detections(results['detections'], ground_truth, results['frames_sampled'])
+    return {
+        'frames_sampled': results['frames_sampled'],
+        'frames_analyzed': results['frames_analyzed'],
+        'processing_time': results['processing_time'],
+        'fps': results['frames_sampled'] / results['processing_time'] if results['processing_time'] else 0,
+        'decode_fps': (results['frames_sampled'] / results['decode_time']
+                       if results['decode_time'] else 0),
+        'inference_fps': (results['frames_analyzed'] / results['inference_time']
+                          if results['inference_time'] else 0),
+        'peak_rss_mb': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+        'detection_rate': results['detection_rate'],
+        'stage_latency_ms': {stage: {key: row[key] for key in ('p50_ms', 'p95_ms', 'p99_ms')}
+                             for stage, row in results['profile']['stages'].items()},
+        **scores
+    }
+
+
+def environment_info():
+    try:
+        commit = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True,
+                                text=True, check=True).stdout.strip()
+    except (subprocess.CalledProcessError, FileNotFoundError):
+        commit = None
+
+    return {
+        'commit': commit,
+        'date': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'platform': platform.platform(),
+        'processor': platform.processor(),
+        'cpu_count': os.cpu_count(),
+        'python': platform.python_version(),
+        'opencv': cv2.__version__
+    }
+
+
+def run_suite(model_path=DEFAULT_MODEL_PATH, resolutions=((1280, 720),), frames=900,
+              sample_rates=(1, 10), scales=(0.4,), batch_sizes=(1, 8), backends=("pt",),
+              video_dir=DEFAULT_VIDEO_DIR):
+    """
+    Run every combination of the given parameters on generated videos
+
+    Each run happens in a fresh process, so peak RSS is measured per run.
+    Returns the machine-readable result document.
+    """
+    runs = []
+    grid = list(itertools.product(resolutions, sample_rates, scales, batch_sizes, backends))
+    spawn = get_context('spawn')
+
+    for i, ((width, height), sample_rate, scale, batch_size, backend) in enumerate(grid, 1):
+        video_path, _ = make_synthetic_video(video_dir, width, height, frames)
+        gt_path = video_path[:-len('.mp4')] + ".gt.json"
+        config = {'sample_rate': sample_rate, 'scale': scale, 'batch_size': batch_size, 'backend': backend}
+
+        print(f"[{i}/{len(grid)}] {width}x{height} | sample {sample_rate} | scale {scale} | "
+              f"batch {batch_size} | {backend}")
+
+        with ProcessPoolExecutor(max_workers=1, mp_context=spawn) as executor:
+            metrics = executor.submit(_run_config, video_path, gt_path, model_path, config).result()
+
+        if 'error' in metrics:
+            print(f"  ✗ {metrics['error']}")
+        else:
+            print(f"  {metrics['fps']:.1f} fps | decode {metrics['decode_fps']:.1f} | "
+                  f"inference {metrics['inference_fps']:.1f} | {metrics['peak_rss_mb']:.0f} MB | "
+                  f"recall {metrics['recall']:.2f}")
+
+        runs.append({'video': {'width': width, 'height': height, 'frames': frames},
+                     'config': config, 'metrics': metrics})
+
+    return {'environment': environment_info(), 'model': model_path, 'runs': runs}
+
+
+def run_key(run):
+    video, config = run['video'], run['config']
+    return (video['width'], video['height'], video['frames'], config['sample_rate'],
+            config['scale'], config['batch_size'], config['backend'])
+
+
+def print_comparison(baseline, current):
+    """Per-config fps / recall / RSS deltas of `current` against `baseline`"""
+    base_runs = {run_key(run): run['metrics'] for run in baseline['runs']}
+
+    print(f"\n{'='*86}")
+    print(f"Baseline {baseline['environment'].get('commit')} → current {current['environment'].get('commit')}")
+    print(f"{'-'*86}")
+    print(f"{'Config':<40}{'fps':>10}{'Δfps':>9}{'recall':>9}{'Δrecall':>9}{'ΔRSS MB':>9}")
+    for run in current['runs']:
+        key = run_key(run)
+        metrics = run['metrics']
+        base = base_runs.get(key)
+        label = f"{key[0]}x{key[1]} s{key[3]} x{key[4]} b{key[5]} {key[6]}"
+        if 'error' in metrics or base is None or 'error' in base:
+            print(f"{label:<40}{'—':>10}")
+            continue
+        change = (metrics['fps'] / base['fps'] - 1) * 100 if base['fps'] else 0
+        print(f"{label:<40}{metrics['fps']:>10.1f}{change:>+8.1f}%{metrics['recall']:>9.2f}"
+              f"{metrics['recall'] - base['recall']:>+9.2f}{metrics['peak_rss_mb'] - base['peak_rss_mb']:>+9.0f}")
+    print(f"{'='*86}\n")
+
+
+def parse_resolution(value):
+    width, _, height = value.partition('x')
+    return int(width), int(height)
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Benchmark the detector on synthetic videos",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="Examples:\n"
+               "  python scripts/benchmark_suite.py\n"
+               "  python scripts/benchmark_suite.py --resolutions 1920x1080 --batch-sizes 1 4 16\n"
+               "  python scripts/benchmark_suite.py --backends pt onnx --compare baseline.json")
+    parser.add_argument('--model', default=DEFAULT_MODEL_PATH)
+    parser.add_argument('--resolutions', nargs='+', type=parse_resolution, default=[(1280, 720)],
+                        metavar='WxH')
+    parser.add_argument('--frames', type=int, default=900, help="length of each synthetic video")
+    parser.add_argument('--sample-rates', nargs='+', type=int, default=[1, 10])
+    parser.add_argument('--scales', nargs='+', type=float, default=[0.4])
+    parser.add_argument('--batch-sizes', nargs='+', type=int, default=[1, 8])
+    parser.add_argument('--backends', nargs='+', choices=BACKENDS, default=["pt"])
+    parser.add_argument('--video-dir', default=DEFAULT_VIDEO_DIR)
+    parser.add_argument('--output', default=DEFAULT_OUTPUT)
+    parser.add_argument('--compare', metavar='BASELINE', help="results file from an earlier commit")
+    args = parser.parse_args()
+
+    if not os.path.exists(args.model):
+        print(f"✗ Model not found: {args.model}")
+        sys.exit(1)
+
+    results = run_suite(model_path=args.model, resolutions=args.resolutions, frames=args.frames,
+                        sample_rates=args.sample_rates, scales=args.scales, batch_sizes=args.batch_sizes,
+                        backends=args.backends, video_dir=args.video_dir)
+
+    with open(args.output, 'w') as f:
+        json.dump(results, f, indent=2)
+    print(f"\n✓ Saved: {args.output}")
+
+    if args.compare:
+        with open(args.compare, 'r') as f:
+            print_comparison(json.load(f), results)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,208 @@
+#!/usr/bin/env python3
+"""Binary (.npy) annotation format with lossless COCO JSON conversion"""
+
+import argparse
+import json
+import os
+import sys
+import time
+import zlib
+
+import numpy as np
+
+FORMAT_NAME = "ball-annotations-npy"
+FORMAT_VERSION = 1
+
+# One fixed-width record per annotation, in COCO order
+ANNOTATION_DTYPE = np.dtype([
+    ('frame_id', '<i4'),
+    ('id', '<i4'),
+    ('x', '<f8'),
+    ('y', '<f8'),
+    ('flags', 'u1'),
+])
+
+FLAG_INTERPOLATED = 1  # "interpolated": true
+FLAG_DETECTOR = 2  # "source": "detector" (accepted pre-annotation candidate)
+FLAG_FLOAT_X = 4  # center x was a float in the JSON (ints round-trip as ints)
+FLAG_FLOAT_Y = 8
+
+_HANDLED_KEYS = {"id", "video_id", "frame_id", "center"}
+
+
+def meta_path(npy_path):
+    return os.path.splitext(npy_path)[0] + ".meta.json"
+
+
+def coco_to_records(coco):
+    """(records, meta) for a COCO document. Anything the fixed-width record
+    can't hold (other video ids, unknown keys) goes to meta['extra'] keyed
+    by record index, so the conversion is lossless."""
+    annotations = coco.get("annotations", [])
+    video_id = coco.get("video", {}).get("id", 1)
+    records = np.zeros(len(annotations), dtype=ANNOTATION_DTYPE)
+    extra = {}
+
+    for i, ann in enumerate(annotations):
+        x, y = ann["center"]
+        flags = 0
+        if isinstance(x, float):
+            flags |= FLAG_FLOAT_X
+        if isinstance(y, float):
+            flags |= FLAG_FLOAT_Y
+
+        leftover = {key: value for key, value in ann.items() if key not in _HANDLED_KEYS}
+        if leftover.get("interpolated") is True:
+            flags |= FLAG_INTERPOLATED
+            del leftover["interpolated"]
+        if leftover.get("source") == "detector":
+            flags |= FLAG_DETECTOR
+            del leftover["source"]
+        if ann.get("video_id") != video_id:
+            leftover["video_id"] = ann.get("video_id")
+        if leftover:
+            extra[str(i)] = leftover
+
+        records[i] = (ann["frame_id"], ann["id"], x, y, flags)
+
+    meta = {
+        "format": FORMAT_NAME,
+        "version": FORMAT_VERSION,
+        "video_id": video_id,
+        "coco": {key: value for key, value in coco.items() if key != "annotations"},
+        "extra": extra,
+    }
+    return records, meta
+
+
+def records_to_coco(records, meta):
+    """COCO document from records and their meta (inverse of coco_to_records)"""
+    video_id = meta.get("video_id", 1)
+    extra = meta.get("extra", {})
+    annotations = []
+
+    frame_ids = records['frame_id'].tolist()
+    ids = records['id'].tolist()
+    xs = records['x'].tolist()
+    ys = records['y'].tolist()
+    flags = records['flags'].tolist()
+
+    for i in range(len(records)):
+        f = flags[i]
+        ann = {
+            "id": ids[i],
+            "video_id": video_id,
+            "frame_id": frame_ids[i],
+            "center": [xs[i] if f & FLAG_FLOAT_X else int(xs[i]),
+                       ys[i] if f & FLAG_FLOAT_Y else int(ys[i])]
+        }
+        if f & FLAG_DETECTOR:
+            ann["source"] = "detector"
+        if f & FLAG_INTERPOLATED:
+            ann["interpolated"] = True
+        if str(i) in extra:
+            ann.update(extra[str(i)])
+        annotations.append(ann)
+
+    return dict(meta.get("coco", {}), annotations=annotations)
+
+
+def records_checksum(records):
+    return zlib.crc32(np.ascontiguousarray(records).view(np.uint8))
+
+
+def save_npy(coco, npy_path):
+    """Write `npy_path` and its .meta.json sidecar (each replaced atomically).
+
+    The sidecar goes first and records the count and CRC32 of the records it
+    belongs to, so a crash between the two replaces leaves a pair that
+    load_npy rejects instead of new records with stale `extra` (or the
+    reverse)."""
+    records, meta = coco_to_records(coco)
+    meta["records"] = {"count": len(records), "crc32": records_checksum(records)}
+    os.makedirs(os.path.dirname(os.path.abspath(npy_path)), exist_ok=True)
+
+    partial = meta_path(npy_path) + ".partial"
+    with open(partial, 'w') as f:
+        json.dump(meta, f, indent=2)
+    os.replace(partial, meta_path(npy_path))
+
+    partial = npy_path + ".partial"
+    with open(partial, 'wb') as f:
+        np.save(f, records)
+    os.replace(partial, npy_path)
+    return npy_path
+
+
+def load_npy(npy_path, mmap=True):
+    """(records, meta); records are memory-mapped (read-only) by default"""
+    records = np.load(npy_path, mmap_mode='r' if mmap else None)
+    if records.dtype != ANNOTATION_DTYPE:
+        raise ValueError(f"{npy_path}: unexpected record layout {records.dtype}")
+    with open(meta_path(npy_path), 'r') as f:
+        meta = json.load(f)
+    check = meta.get("records")  # absent in files written before the check existed
+    if check is not None and (check["count"] != len(records) or check["crc32"] != records_checksum(records)):
+        raise ValueError(f"{npy_path}: records don't match {meta_path(npy_path)} (interrupted save?)")
+    return records, meta
+
+
+def load_annotations(path, mmap=True):
+    """(records, meta) from either a .npy file or a COCO JSON file"""
+    if path.endswith(".npy"):
+        return load_npy(path, mmap)
+    with open(path, 'r') as f:
+        return coco_to_records(json.load(f))
+
+
+def load_coco(path):
+    """COCO document from either format"""
+    if path.endswith(".npy"):
+        return records_to_coco(*load_npy(path))
+    with open(path, 'r') as f:
+        return json.load(f)
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Convert annotations between COCO JSON and the binary .npy format",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="Examples:\n"
+               "  python annotation_io.py annotations/match_coco.json annotations/match.npy\n"
+               "  python annotation_io.py annotations/match.npy annotations/match_coco.json")
+    parser.add_argument('input', help=".json or .npy")
+    parser.add_argument('output', help=".npy or .json")
+    args = parser.parse_args()
+
+    if not os.path.exists(args.input):
+        print(f"✗ Not found: {args.input}")
+        sys.exit(1)
+
+    t0 = time.perf_counter()
+    coco = load_coco(args.input)
+    load_time = time.perf_counter() - t0
+
+    if args.output.endswith(".npy"):
+        save_npy(coco, args.output)
+        converted = load_coco(args.output)
+    else:
+        with open(args.output, 'w') as f:
+            json.dump(coco, f, indent=2)
+        with open(args.output, 'r') as f:
+            converted = json.load(f)
+
+    if converted != coco:
+        print(f"✗ Round trip mismatch: {args.output}")
+        sys.exit(1)
+
+    t0 = time.perf_counter()
+    load_annotations(args.output)
+    output_load_time = time.perf_counter() - t0
+
+    print(f"✓ {len(coco['annotations'])} annotations: {args.input} → {args.output} (lossless)")
+    print(f"  {os.path.getsize(args.input) / 1e6:.2f} MB → {os.path.getsize(args.output) / 1e6:.2f} MB | "
+          f"load {load_time * 1000:.1f} ms → {output_load_time * 1000:.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,131 @@
+#!/usr/bin/env python3
+"""Append-only, crash-safe journal of annotation edits"""
+
+import json
+import os
+import queue
+import threading
+import time
+
+FSYNC_INTERVAL = 1.0  # seconds between fsyncs of the journal while recording
+
+
+class AnnotationJournal:
+    """One JSON line per edit ({"op": "upsert", "annotation": ...},
+    {"op": "delete", "frame_id": ...} or {"op": "reject", "frame_id": ...}
+    for a rejected detector candidate), written by a background thread.
+
+    compact(write_snapshot) runs write_snapshot in the writer thread and then
+    empties the journal; everything queued before the call is in the
+    snapshot and everything queued after it lands in the fresh journal, so
+    replaying the journal over the last snapshot always gives the current
+    state. Replay is idempotent, so a crash between the two steps is safe.
+    """
+
+    def __init__(self, path, fsync_interval=FSYNC_INTERVAL):
+        self.path = path
+        self.fsync_interval = fsync_interval
+        self.records = 0  # since the last compaction
+        self.errors = []
+        self._queue = queue.Queue()
+        self._file = None
+        self._thread = None
+
+    def replay(self, annotations, rejected=None):
+        """Apply the journal to a frame_id -> annotation dict (and rejections
+        to the `rejected` set of frame ids); returns the number of records
+        applied. A half-written last line is dropped."""
+        if not os.path.exists(self.path):
+            return 0
+
+        applied = 0
+        good_bytes = 0
+        with open(self.path, 'rb') as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    break
+                if record['op'] == 'upsert':
+                    annotations[record['annotation']['frame_id']] = record['annotation']
+                elif record['op'] == 'delete':
+                    annotations.pop(record['frame_id'], None)
+                elif record['op'] == 'reject' and rejected is not None:
+                    rejected.add(record['frame_id'])
+                applied += 1
+                good_bytes += len(line)
+
+        if good_bytes < os.path.getsize(self.path):
+            with open(self.path, 'r+b') as f:
+                f.truncate(good_bytes)
+        self.records = applied
+        return applied
+
+    def start(self):
+        os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+        self._file = open(self.path, 'ab')
+        self._thread = threading.Thread(target=self._write, name="journal", daemon=True)
+        self._thread.start()
+
+    def running(self):
+        return self._thread is not None
+
+    def upsert(self, annotation):
+        self._append({'op': 'upsert', 'annotation': annotation})
+
+    def delete(self, frame_id):
+        self._append({'op': 'delete', 'frame_id': frame_id})
+
+    def reject(self, frame_id):
+        self._append({'op': 'reject', 'frame_id': frame_id})
+
+    def _append(self, record):
+        self.records += 1
+        self._queue.put(('record', (json.dumps(record) + "\n").encode()))
+
+    def compact(self, write_snapshot):
+        self.records = 0
+        self._queue.put(('compact', write_snapshot))
+
+    def flush(self):
+        """Block until every queued edit is written and synced"""
+        self._queue.put(('sync', None))
+        self._queue.join()
+
+    def close(self):
+        if self._thread is None:
+            return
+        self._queue.put(('stop', None))
+        self._thread.join()
+        self._file.close()
+        self._thread = None
+
+    def _write(self):
+        last_sync = time.monotonic()
+        while True:
+            kind, payload = self._queue.get()
+            try:
+                if kind == 'record':
+                    self._file.write(payload)
+                elif kind == 'compact':
+                    self._file.flush()
+                    payload()
+                    self._file.truncate(0)
+                    self._file.seek(0)
+                elif kind in ('sync', 'stop'):
+                    self._file.flush()
+                    os.fsync(self._file.fileno())
+                    last_sync = time.monotonic()
+
+                if self._queue.empty():
+                    self._file.flush()
+                    if time.monotonic() - last_sync >= self.fsync_interval:
+                        os.fsync(self._file.fileno())
+                        last_sync = time.monotonic()
+            except Exception as e:  # keep journaling; surfaced through self.errors
+                self.errors.append(e)
+            finally:
+                self._queue.task_done()
+
+            if kind == 'stop':
+                return
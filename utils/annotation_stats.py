@@ -0,0 +1,242 @@
+#!/usr/bin/env python3
+"""Vectorized annotation statistics and quality report"""
+
+import argparse
+import json
+import os
+import sys
+import time
+from pathlib import Path
+
+import cv2
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from utils.annotation_io import FLAG_DETECTOR, FLAG_INTERPOLATED, load_annotations
+
+MAX_STEP_GAP = 5  # frames; longer gaps are not bridged when computing velocity
+SEGMENT_GAP = 30  # frames; a longer gap starts a new segment
+JUMP_MIN_SPEED = 1500.0  # px/s never flagged as an outlier jump below this
+JUMP_MAD = 8.0  # outlier jumps: speed above median + JUMP_MAD * MAD
+HEATMAP_BINS = (48, 27)
+GAP_BUCKETS = (1, 2, 6, 31)  # gap-length histogram edges: 1, 2-5, 6-30, 31+
+TOP_N = 10
+PERCENTILES = (50, 95, 99)
+
+
+def _percentiles(values):
+    if len(values) == 0:
+        return None
+    p = np.percentile(values, PERCENTILES)
+    return {**{f"p{q}": round(float(v), 1) for q, v in zip(PERCENTILES, p)},
+            'max': round(float(values.max()), 1)}
+
+
+def annotation_report(records, fps=30, width=None, height=None):
+    """Quality report of annotation records (see utils/annotation_io.py).
+
+    Everything is computed on whole arrays: gaps from the frame-id
+    differences, velocity/acceleration from position differences over steps
+    of at most MAX_STEP_GAP frames, outlier jumps by a median/MAD threshold
+    on speed, the heatmap with histogram2d and per-segment sums with
+    np.add.reduceat.
+    """
+    frames = np.asarray(records['frame_id'], dtype=np.int64)
+    order = np.argsort(frames, kind='stable')
+    frames, first = np.unique(frames[order], return_index=True)
+    keep = order[first]
+    xy = np.stack([np.asarray(records['x'])[keep], np.asarray(records['y'])[keep]], axis=1)
+    flags = np.asarray(records['flags'])[keep]
+
+    report = {'annotations': int(len(records)), 'frames': int(len(frames))}
+    if len(frames) == 0:
+        return report
+
+    width = width or float(xy[:, 0].max()) or 1
+    height = height or float(xy[:, 1].max()) or 1
+    span = int(frames[-1] - frames[0] + 1)
+    report.update({
+        'first_frame': int(frames[0]),
+        'last_frame': int(frames[-1]),
+        'coverage': round(len(frames) / span, 4),
+        'duplicates': int(len(records) - len(frames)),
+        'interpolated': int(np.count_nonzero(flags & FLAG_INTERPOLATED)),
+        'detector': int(np.count_nonzero(flags & FLAG_DETECTOR)),
+        'mean_position': [round(float(v), 1) for v in xy.mean(axis=0)],
+    })
+
+    # Coverage gaps
+    steps = np.diff(frames)
+    gap_lengths = steps - 1
+    is_gap = gap_lengths > 0
+    gap_idx = np.nonzero(is_gap)[0]
+    longest = gap_idx[np.argsort(gap_lengths[gap_idx], kind='stable')[::-1][:TOP_N]]
+    buckets = np.histogram(gap_lengths[is_gap], bins=list(GAP_BUCKETS) + [np.inf])[0]
+    report['gaps'] = {
+        'count': int(len(gap_idx)),
+        'missing_frames': int(gap_lengths[is_gap].sum()),
+        'histogram': {label: int(n) for label, n in zip(("1", "2-5", "6-30", "31+"), buckets)},
+        'longest': [{'after': int(frames[i]), 'before': int(frames[i + 1]), 'frames': int(gap_lengths[i])}
+                    for i in longest]
+    }
+
+    # Velocity over short steps (px/s), acceleration over consecutive valid steps (px/s²)
+    dxy = np.diff(xy, axis=0)
+    valid = steps <= MAX_STEP_GAP
+    velocity = dxy / (steps / fps)[:, None]
+    speed = np.hypot(velocity[:, 0], velocity[:, 1])
+    valid_speed = speed[valid]
+
+    both = valid[1:] & valid[:-1]
+    mid_dt = ((steps[1:] + steps[:-1]) / 2 / fps)[:, None]
+    accel = np.hypot(*((velocity[1:] - velocity[:-1]) / mid_dt)[both].T)
+    report['speed_px_s'] = _percentiles(valid_speed)
+    report['accel_px_s2'] = _percentiles(accel)
+
+    # Outlier jumps (likely mouse slips): speed far above the typical one
+    if len(valid_speed):
+        median = np.median(valid_speed)
+        mad = np.median(np.abs(valid_speed - median))
+        threshold = max(JUMP_MIN_SPEED, median + JUMP_MAD * mad)
+        jump_idx = np.nonzero(valid & (speed > threshold))[0]
+        # A slip jumps out and straight back: out and return steps both flagged
+        out_back = np.zeros(len(speed), dtype=bool)
+        out_back[jump_idx] = True
+        spikes = np.nonzero(out_back[:-1] & out_back[1:])[0] + 1  # point index of the slip
+        worst = jump_idx[np.argsort(speed[jump_idx])[::-1][:TOP_N]]
+        report['jumps'] = {
+            'threshold_px_s': round(float(threshold), 1),
+            'count': int(len(jump_idx)),
+            'spikes': [int(f) for f in frames[spikes][:TOP_N * 10]],
+            'worst': [{'frame': int(frames[i + 1]), 'speed_px_s': round(float(speed[i]), 1),
+                       'px': round(float(np.hypot(*dxy[i])), 1)} for i in worst]
+        }
+
+    # Position heatmap (rows = y)
+    heatmap, _, _ = np.histogram2d(xy[:, 1], xy[:, 0], bins=HEATMAP_BINS[::-1],
+                                   range=[[0, height], [0, width]])
+    report['heatmap'] = heatmap.astype(int)
+
+    # Segments: runs of annotations without a gap longer than SEGMENT_GAP
+    starts = np.concatenate([[0], np.nonzero(steps > SEGMENT_GAP)[0] + 1])
+    ends = np.concatenate([starts[1:], [len(frames)]]) - 1
+    path_step = np.concatenate([[0.0], np.where(valid, np.hypot(dxy[:, 0], dxy[:, 1]), 0.0)])
+    path_step[starts] = 0.0  # no path across segment boundaries
+    path = np.add.reduceat(path_step, starts)
+    interp = np.add.reduceat((flags & FLAG_INTERPOLATED) > 0, starts)
+    count = ends - starts + 1
+    seg_frames = frames[ends] - frames[starts] + 1
+    duration = seg_frames / fps
+    report['segments'] = {
+        'count': int(len(starts)),
+        'rows': [{'start': int(frames[s]), 'end': int(frames[e]), 'annotated': int(c),
+                  'coverage': round(float(c / n), 3), 'interpolated': int(i),
+                  'path_px': round(float(p), 1), 'mean_speed_px_s': round(float(p / d), 1)}
+                 for s, e, c, n, i, p, d in zip(starts, ends, count, seg_frames, interp, path, duration)]
+    }
+    return report
+
+
+def ascii_heatmap(heatmap, cols=24, rows=9):
+    """Coarse text rendering of the heatmap (darkest = most annotations)"""
+    shades = " .:-=+*#%@"
+    h, w = heatmap.shape
+    ys = np.linspace(0, h, rows + 1).astype(int)
+    xs = np.linspace(0, w, cols + 1).astype(int)
+    coarse = np.add.reduceat(np.add.reduceat(heatmap, ys[:-1], axis=0), xs[:-1], axis=1)
+    levels = np.ceil(coarse / max(coarse.max(), 1) * (len(shades) - 1)).astype(int)
+    return ["|" + "".join(shades[v] for v in row) + "|" for row in levels]
+
+
+def write_heatmap(heatmap, path, size=(960, 540)):
+    norm = np.log1p(heatmap) / max(np.log1p(heatmap).max(), 1e-9)
+    image = cv2.applyColorMap((norm * 255).astype(np.uint8), cv2.COLORMAP_INFERNO)
+    cv2.imwrite(path, cv2.resize(image, size, interpolation=cv2.INTER_NEAREST))
+
+
+def print_report(report, elapsed=None):
+    print(f"\n{'='*70}")
+    print(f"ANNOTATION QUALITY REPORT")
+    print(f"{'='*70}")
+    print(f"Annotations: {report['annotations']} on {report['frames']} frames")
+    if report['frames'] == 0:
+        print(f"{'='*70}\n")
+        return
+
+    print(f"Frame range: {report['first_frame']} - {report['last_frame']} | coverage {report['coverage']:.1%}")
+    print(f"Interpolated: {report['interpolated']} | From detector: {report['detector']} | "
+          f"Duplicate frames: {report['duplicates']}")
+
+    gaps = report['gaps']
+    print(f"\nGaps: {gaps['count']} ({gaps['missing_frames']} frames missing) | "
+          + " | ".join(f"{label}: {n}" for label, n in gaps['histogram'].items()))
+    for gap in gaps['longest'][:5]:
+        print(f"  {gap['frames']:>7} frames between {gap['after']} and {gap['before']}")
+
+    for label, key in (("Speed (px/s)", 'speed_px_s'), ("Accel (px/s²)", 'accel_px_s2')):
+        p = report[key]
+        if p:
+            print(f"{label:<14} " + " | ".join(f"{name} {value:.0f}" for name, value in p.items()))
+
+    jumps = report.get('jumps')
+    if jumps:
+        print(f"\nOutlier jumps: {jumps['count']} above {jumps['threshold_px_s']:.0f} px/s | "
+              f"{len(jumps['spikes'])} out-and-back slips")
+        for jump in jumps['worst'][:5]:
+            print(f"  frame {jump['frame']:>7}: {jump['px']:.0f} px ({jump['speed_px_s']:.0f} px/s)")
+        if jumps['spikes']:
+            print(f"  slips at frames: {', '.join(map(str, jumps['spikes'][:TOP_N]))}")
+
+    segments = report['segments']
+    print(f"\nSegments: {segments['count']} (split at gaps over {SEGMENT_GAP} frames)")
+    print(f"  {'start':>7} {'end':>7} {'annotated':>9} {'cover':>6} {'interp':>6} {'speed':>7}")
+    for row in sorted(segments['rows'], key=lambda r: -r['annotated'])[:TOP_N]:
+        print(f"  {row['start']:>7} {row['end']:>7} {row['annotated']:>9} {row['coverage']:>6.0%} "
+              f"{row['interpolated']:>6} {row['mean_speed_px_s']:>7.0f}")
+
+    print(f"\nHeatmap:")
+    for line in ascii_heatmap(report['heatmap']):
+        print(f"  {line}")
+
+    if elapsed is not None:
+        print(f"\nAnalysed in {elapsed * 1000:.0f} ms")
+    print(f"{'='*70}\n")
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Quality report of ball annotations",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="Examples:\n"
+               "  python annotation_stats.py annotations/match_coco.json\n"
+               "  python annotation_stats.py annotations/match_coco.npy --heatmap heatmap.png\n"
+               "  python annotation_stats.py annotations/match_coco.npy --json report.json")
+    parser.add_argument('annotation_file', help="COCO .json or binary .npy")
+    parser.add_argument('--heatmap', metavar='PATH', help="write the position heatmap as an image")
+    parser.add_argument('--json', metavar='PATH', help="write the full report as JSON")
+    args = parser.parse_args()
+
+    if not os.path.exists(args.annotation_file):
+        print(f"✗ Annotation file not found: {args.annotation_file}")
+        sys.exit(1)
+
+    records, meta = load_annotations(args.annotation_file)
+    video = meta['coco'].get('video', {})
+
+    start = time.perf_counter()
+    report = annotation_report(records, video.get('fps') or 30, video.get('width'), video.get('height'))
+    elapsed = time.perf_counter() - start
+    print_report(report, elapsed)
+
+    if args.heatmap and 'heatmap' in report:
+        write_heatmap(report['heatmap'], args.heatmap)
+        print(f"✓ Heatmap: {args.heatmap}")
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(dict(report, heatmap=report.get('heatmap', np.zeros(0)).tolist()), f, indent=2)
+        print(f"✓ Report: {args.json}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+"""Bounded LRU cache of decoded video frames"""
+
+from collections import OrderedDict
+
+import cv2
+
+DEFAULT_CACHE_MB = 512
+
+
+class FrameCache:
+    """Recently decoded frames keyed by frame index, evicted least recently
+    used first once `max_mb` (or `max_frames`) is exceeded.
+
+    With a `scale`, frames are stored resized by that factor (e.g. the
+    display zoom), so many more fit in the same memory; set_scale() drops
+    everything stored at another scale.
+    """
+
+    def __init__(self, max_mb=DEFAULT_CACHE_MB, max_frames=None, scale=None):
+        self.max_bytes = int(max_mb * 1024 * 1024)
+        self.max_frames = max_frames
+        self.scale = scale
+        self.frames = OrderedDict()
+        self.nbytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def __contains__(self, frame_idx):
+        return frame_idx in self.frames
+
+    def __len__(self):
+        return len(self.frames)
+
+    def get(self, frame_idx):
+        frame = self.frames.get(frame_idx)
+        if frame is None:
+            self.misses += 1
+            return None
+        self.frames.move_to_end(frame_idx)
+        self.hits += 1
+        return frame
+
+    def put(self, frame_idx, frame):
+        """Store a full-resolution frame; returns the stored (possibly resized) copy"""
+        if self.scale is not None and self.scale != 1:
+            h, w = frame.shape[:2]
+            frame = cv2.resize(frame, (max(1, int(w * self.scale)), max(1, int(h * self.scale))),
+                               interpolation=cv2.INTER_AREA)
+
+        old = self.frames.pop(frame_idx, None)
+        if old is not None:
+            self.nbytes -= old.nbytes
+        self.frames[frame_idx] = frame
+        self.nbytes += frame.nbytes
+
+        while self.frames and (self.nbytes > self.max_bytes or
+                               (self.max_frames is not None and len(self.frames) > self.max_frames)):
+            _, evicted = self.frames.popitem(last=False)
+            self.nbytes -= evicted.nbytes
+            self.evictions += 1
+        return frame
+
+    def read(self, seeker, frame_idx, backfill=0):
+        """Frame `frame_idx` from the cache, or decoded through `seeker` (a
+        utils.video_index.FrameSeeker) and cached; None past the end.
+
+        A backward jump starts `backfill` frames earlier and caches them on
+        the way, so the following steps back are served from memory.
+        """
+        frame = self.get(frame_idx)
+        if frame is not None:
+            return frame
+
+        start = max(0, frame_idx - backfill) if frame_idx < seeker.pos else frame_idx
+        if not seeker.seek(start):
+            return None
+
+        while seeker.pos <= frame_idx:
+            ret, frame = seeker.read()
+            if not ret:
+                return None
+            frame = self.put(seeker.pos - 1, frame)
+        return frame
+
+    def capacity(self, frame_nbytes):
+        """How many frames of `frame_nbytes` (full resolution) fit"""
+        stored = frame_nbytes * (self.scale ** 2 if self.scale else 1)
+        frames = int(self.max_bytes // max(1, stored))
+        return min(frames, self.max_frames) if self.max_frames is not None else frames
+
+    def set_scale(self, scale):
+        if scale != self.scale:
+            self.scale = scale
+            self.clear()
+
+    def clear(self):
+        self.frames.clear()
+        self.nbytes = 0
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            'frames': len(self.frames),
+            'mb': self.nbytes / (1024 * 1024),
+            'hit_rate': self.hits / lookups if lookups else 0,
+            'evictions': self.evictions
+        }
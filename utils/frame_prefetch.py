@@ -0,0 +1,81 @@
+#!/usr/bin/env python3
+"""Background decoder that reads video frames ahead of the playhead"""
+
+import queue
+import sys
+import threading
+from pathlib import Path
+
+import cv2
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from utils.video_index import FrameSeeker
+
+DEFAULT_PREFETCH_FRAMES = 64
+
+
+class FramePrefetcher:
+    """Decodes frames from `start_frame` on in a background thread into a
+    bounded queue, so the UI loop only pops ready frames.
+
+    The thread has its own VideoCapture, positioned and tracked by a
+    FrameSeeker over the keyframe `index` (see utils/video_index.py), so each
+    frame is labelled with the frame it really is. With a `display_size` (w, h) each
+    frame is also resized for display in the thread; the size can be changed
+    while running (zoom) and applies from the next decoded frame.
+    """
+
+    END = None
+
+    def __init__(self, video_path, start_frame=0, queue_size=DEFAULT_PREFETCH_FRAMES, display_size=None,
+                 index=None):
+        self.video_path = video_path
+        self.start_frame = start_frame
+        self.index = index
+        self.display_size = display_size
+        self.frames = queue.Queue(maxsize=queue_size)
+        self.stop_event = threading.Event()
+        self.late = 0  # frames the consumer had to wait for
+        self.thread = threading.Thread(target=self._decode, name="prefetch", daemon=True)
+        self.thread.start()
+
+    def _put(self, item):
+        while not self.stop_event.is_set():
+            try:
+                self.frames.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def _decode(self):
+        cap = cv2.VideoCapture(self.video_path)
+        seeker = FrameSeeker(cap, self.index)
+        try:
+            if seeker.seek(self.start_frame):
+                while not self.stop_event.is_set():
+                    ret, frame = seeker.read()
+                    if not ret:
+                        break
+                    size = self.display_size
+                    display = cv2.resize(frame, size) if size is not None else None
+                    if not self._put((seeker.pos - 1, frame, display)):
+                        return
+            self._put(self.END)
+        finally:
+            cap.release()
+
+    def get(self):
+        """Next (frame_idx, frame, display_frame), or None at the end of the video"""
+        try:
+            return self.frames.get_nowait()
+        except queue.Empty:
+            self.late += 1
+            return self.frames.get()
+
+    def close(self):
+        self.stop_event.set()
+        while not self.frames.empty():
+            self.frames.get_nowait()
+        self.thread.join()
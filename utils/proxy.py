@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+"""Low-resolution, short-GOP proxy videos for annotation sessions"""
+
+import argparse
+import hashlib
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+import cv2
+
+DEFAULT_PROXY_HEIGHT = 540
+PROXY_DIR = "cache/proxies"
+PROXY_GOP = 10  # keyframe every N frames, so any seek decodes at most this many
+
+
+def proxy_path(video_path, height=DEFAULT_PROXY_HEIGHT, proxy_dir=PROXY_DIR):
+    """Cache location of the proxy; changes when the source file changes"""
+    stat = os.stat(video_path)
+    key = f"{os.path.abspath(video_path)}:{stat.st_size}:{stat.st_mtime_ns}"
+    digest = hashlib.sha256(key.encode()).hexdigest()[:12]
+    return os.path.join(proxy_dir, f"{Path(video_path).stem}-{digest}-{height}p.mp4")
+
+
+def _transcode_ffmpeg(video_path, output_path, height):
+    subprocess.run(
+        ['ffmpeg', '-v', 'error', '-y', '-i', video_path,
+         '-map', '0:v:0', '-an',
+         '-vf', f'scale=-2:{height}',
+         '-c:v', 'libx264', '-preset', 'veryfast', '-crf', '23',
+         '-g', str(PROXY_GOP), '-bf', '0',
+         '-vsync', '0',  # keep every frame, so frame numbers match the original
+         output_path],
+        check=True
+    )
+
+
+def _transcode_opencv(video_path, output_path, height):
+    cap = cv2.VideoCapture(video_path)
+    fps = cap.get(cv2.CAP_PROP_FPS) or 30
+    w = int(cap.get(cv2.CAP_PROP_FRAME_WIDTH))
+    h = int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
+    size = (max(2, int(round(w * height / h / 2)) * 2), height)
+
+    writer = cv2.VideoWriter(output_path, cv2.VideoWriter_fourcc(*'mp4v'), fps, size)
+    while True:
+        ret, frame = cap.read()
+        if not ret:
+            break
+        writer.write(cv2.resize(frame, size, interpolation=cv2.INTER_AREA))
+    writer.release()
+    cap.release()
+
+
+def build_proxy(video_path, height=DEFAULT_PROXY_HEIGHT, proxy_dir=PROXY_DIR, verbose=True):
+    """Return the path of a `height`p proxy of `video_path`, transcoding it once.
+
+    Uses ffmpeg (H.264, keyframe every PROXY_GOP frames, no B-frames) and
+    falls back to an OpenCV mp4v transcode when ffmpeg is not installed.
+    The proxy has the same frames as the original, only smaller.
+    """
+    path = proxy_path(video_path, height, proxy_dir)
+    if os.path.exists(path):
+        return path
+
+    os.makedirs(proxy_dir, exist_ok=True)
+    partial = path[:-len('.mp4')] + ".partial.mp4"
+    if verbose:
+        print(f"→ Building {height}p proxy (once per video): {path}")
+
+    try:
+        _transcode_ffmpeg(video_path, partial, height)
+    except (subprocess.CalledProcessError, FileNotFoundError):
+        if verbose:
+            print("⚠ ffmpeg unavailable - transcoding with OpenCV (slower, longer GOP)")
+        _transcode_opencv(video_path, partial, height)
+
+    os.replace(partial, path)
+    return path
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build the low-resolution proxy of a video")
+    parser.add_argument('video_path')
+    parser.add_argument('--height', type=int, default=DEFAULT_PROXY_HEIGHT)
+    parser.add_argument('--proxy-dir', default=PROXY_DIR)
+    args = parser.parse_args()
+
+    if not os.path.exists(args.video_path):
+        print(f"✗ Video not found: {args.video_path}")
+        sys.exit(1)
+
+    print(f"✓ {build_proxy(args.video_path, args.height, args.proxy_dir)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,300 @@
+#!/usr/bin/env python3
+"""Headless parallel rendering of annotation review videos and contact sheets"""
+
+import argparse
+import json
+import multiprocessing
+import os
+import shutil
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+import cv2
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from utils.annotation_io import load_annotations
+from utils.video_index import FrameSeeker, load_keyframe_index
+from utils.view_annotations import annotations_at, draw_annotations, frame_lookup
+
+SEGMENTS_PER_WORKER = 2  # smaller segments balance uneven decode speed across workers
+DEFAULT_EVERY = 150  # contact sheet: one thumbnail every N frames
+DEFAULT_COLS = 6
+DEFAULT_ROWS = 8
+DEFAULT_THUMB_WIDTH = 320
+
+
+def load_detections(path):
+    """frame_id (0-based, like annotations) -> detection, from a detector
+    JSONL stream or a *_detections.json report (1-based 'frame')"""
+    if path.endswith(".jsonl"):
+        with open(path, 'r') as f:
+            detections = [json.loads(line) for line in f if line.strip()]
+    else:
+        with open(path, 'r') as f:
+            detections = json.load(f)['detections']
+    return {det['frame'] - 1: det for det in detections}
+
+
+def draw_detection(frame, detection):
+    x1, y1, x2, y2 = (int(v) for v in detection['bbox'])
+    cv2.rectangle(frame, (x1, y1), (x2, y2), (255, 0, 255), 2)
+    cv2.putText(frame, f"{detection['confidence']:.2f}", (x1, max(12, y1 - 6)),
+               cv2.FONT_HERSHEY_SIMPLEX, 0.5, (255, 0, 255), 1)
+
+
+def plan_segments(start, end, segments, align=1):
+    """Split [start, end) into up to `segments` ranges starting on multiples of `align`"""
+    if end <= start:
+        return []
+    step = -(-(end - start) // max(1, segments))
+    step += -step % align
+    return [(s, min(s + step, end)) for s in range(start, end, step)]
+
+
+def _init_worker(threads_per_worker):
+    cv2.setNumThreads(threads_per_worker)
+
+
+def _render_frame(seeker, frame_idx, task):
+    ret, frame = seeker.read()
+    if not ret:
+        return None
+    draw_annotations(frame, annotations_at(task['records'], frame_idx), frame_idx, task['total_frames'])
+    detection = task['detections'].get(frame_idx)
+    if detection is not None:
+        draw_detection(frame, detection)
+    return frame
+
+
+def _render_video_segment(task):
+    """Decode, draw and encode frames [start, end) into their own file"""
+    start, end = task['range']
+    cap = cv2.VideoCapture(task['video_path'])
+    seeker = FrameSeeker(cap, task['index'])
+    writer = cv2.VideoWriter(task['segment_path'], cv2.VideoWriter_fourcc(*'mp4v'), task['fps'], task['size'])
+
+    written = 0
+    if seeker.seek(start):
+        for frame_idx in range(start, end):
+            frame = _render_frame(seeker, frame_idx, task)
+            if frame is None:
+                break
+            if frame.shape[1::-1] != task['size']:
+                frame = cv2.resize(frame, task['size'], interpolation=cv2.INTER_AREA)
+            writer.write(frame)
+            written += 1
+
+    writer.release()
+    cap.release()
+    return start, task['segment_path'], written
+
+
+def _render_sheet_segment(task):
+    """Thumbnails every `every` frames in [start, end), tiled into whole
+    contact-sheet pages (segments start on page boundaries)"""
+    start, end = task['range']
+    every, cols, rows = task['every'], task['cols'], task['rows']
+    thumb_w, thumb_h = task['thumb_size']
+    cap = cv2.VideoCapture(task['video_path'])
+    seeker = FrameSeeker(cap, task['index'])
+
+    thumbs = []
+    for frame_idx in range(start, end, every):
+        if not seeker.seek(frame_idx):
+            break
+        frame = _render_frame(seeker, frame_idx, task)
+        if frame is None:
+            break
+        thumbs.append(cv2.resize(frame, (thumb_w, thumb_h), interpolation=cv2.INTER_AREA))
+    cap.release()
+
+    pages = []
+    per_page = cols * rows
+    for first in range(0, len(thumbs), per_page):
+        page = thumbs[first:first + per_page]
+        page += [np.zeros_like(thumbs[0])] * (-len(page) % cols)
+        sheet = np.vstack([np.hstack(page[r:r + cols]) for r in range(0, len(page), cols)])
+        page_no = (start // every + first) // per_page + 1
+        path = os.path.join(task['output'], f"sheet_{page_no:04d}.jpg")
+        cv2.imwrite(path, sheet)
+        pages.append(path)
+    return start, pages, len(thumbs)
+
+
+def concat_segments(segment_paths, output_path, fps, size):
+    """Join the segment files with ffmpeg's concat demuxer (no re-encode);
+    without ffmpeg, re-encode them one after another with OpenCV."""
+    list_path = output_path + ".segments.txt"
+    with open(list_path, 'w') as f:
+        for path in segment_paths:
+            f.write(f"file '{os.path.abspath(path)}'\n")
+    try:
+        subprocess.run(['ffmpeg', '-v', 'error', '-y', '-f', 'concat', '-safe', '0', '-i', list_path,
+                        '-c', 'copy', output_path], check=True)
+        return "ffmpeg"
+    except (subprocess.CalledProcessError, FileNotFoundError):
+        writer = cv2.VideoWriter(output_path, cv2.VideoWriter_fourcc(*'mp4v'), fps, size)
+        for path in segment_paths:
+            cap = cv2.VideoCapture(path)
+            while True:
+                ret, frame = cap.read()
+                if not ret:
+                    break
+                writer.write(frame)
+            cap.release()
+        writer.release()
+        return "opencv"
+    finally:
+        os.remove(list_path)
+
+
+def render_review(annotation_file, video_path, output, detections_path=None, workers=None, scale=1.0,
+                  contact_sheet=False, every=DEFAULT_EVERY, cols=DEFAULT_COLS, rows=DEFAULT_ROWS,
+                  thumb_width=DEFAULT_THUMB_WIDTH):
+    """Render a review video (or contact-sheet pages into the `output`
+    directory) with the viewer's overlay, split over a process pool by time
+    segment. Returns a summary dict."""
+    records, _ = load_annotations(annotation_file)
+    records = frame_lookup(records)
+    detections = load_detections(detections_path) if detections_path else {}
+
+    cap = cv2.VideoCapture(video_path)
+    if not cap.isOpened():
+        raise ValueError(f"Cannot open video: {video_path}")
+    total_frames = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
+    fps = cap.get(cv2.CAP_PROP_FPS) or 30
+    width = int(cap.get(cv2.CAP_PROP_FRAME_WIDTH))
+    height = int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
+    cap.release()
+
+    # Index once here so the workers only read the cached file
+    index = load_keyframe_index(video_path)
+    if total_frames <= 0 and index is not None:
+        total_frames = index['frames']  # the container doesn't report a frame count
+    if total_frames <= 0:
+        raise ValueError(f"Unknown frame count (no keyframe index either): {video_path}")
+
+    workers = workers or os.cpu_count() or 1
+    threads_per_worker = max(1, (os.cpu_count() or 1) // workers)
+    segments = workers * SEGMENTS_PER_WORKER
+
+    if contact_sheet:
+        align = every * cols * rows
+        os.makedirs(output, exist_ok=True)
+        segment_dir = None
+    else:
+        align = 1
+        segment_dir = output + ".segments"
+        os.makedirs(segment_dir, exist_ok=True)
+
+    size = (max(2, int(width * scale) // 2 * 2), max(2, int(height * scale) // 2 * 2))
+    thumb_size = (thumb_width, max(2, int(round(height * thumb_width / width))))
+
+    tasks = []
+    for i, (start, end) in enumerate(plan_segments(0, total_frames, segments, align)):
+        lo, hi = np.searchsorted(records['frame_id'], [start, end])
+        tasks.append({
+            'video_path': video_path,
+            'index': index,
+            'range': (start, end),
+            'total_frames': total_frames,
+            'records': np.array(records[lo:hi]),
+            'detections': {k: v for k, v in detections.items() if start <= k < end},
+            'fps': fps,
+            'size': size,
+            'segment_path': os.path.join(segment_dir, f"segment_{i:04d}.mp4") if segment_dir else None,
+            'output': output,
+            'every': every,
+            'cols': cols,
+            'rows': rows,
+            'thumb_size': thumb_size,
+        })
+
+    print(f"\n{'='*70}")
+    print(f"REVIEW RENDER ({'contact sheets' if contact_sheet else 'video'})")
+    print(f"{'='*70}")
+    print(f"Video: {video_path} ({total_frames} frames, {width}x{height} @ {fps:.0f} fps)")
+    print(f"Annotations: {len(records)} | Detections: {len(detections)}")
+    print(f"Segments: {len(tasks)} | Workers: {workers}")
+    print(f"{'='*70}\n")
+
+    start_time = time.time()
+    render = _render_sheet_segment if contact_sheet else _render_video_segment
+    parts = []
+    with multiprocessing.Pool(workers, initializer=_init_worker, initargs=(threads_per_worker,)) as pool:
+        for done, part in enumerate(pool.imap_unordered(render, tasks), 1):
+            parts.append(part)
+            print(f"\r[{done}/{len(tasks)}] segments rendered", end='')
+    print()
+    parts.sort(key=lambda part: part[0])
+
+    summary = {'output': output, 'segments': len(tasks), 'workers': workers}
+    if contact_sheet:
+        summary['pages'] = [page for _, pages, _ in parts for page in pages]
+        summary['thumbnails'] = sum(count for _, _, count in parts)
+        summary['frames'] = total_frames
+    else:
+        summary['frames'] = sum(count for _, _, count in parts)
+        summary['concat'] = concat_segments([path for _, path, _ in parts], output, fps, size)
+        shutil.rmtree(segment_dir)
+
+    summary['wall_time'] = time.time() - start_time
+    summary['realtime_factor'] = summary['frames'] / fps / summary['wall_time'] if summary['wall_time'] else 0
+    return summary
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Render annotations over a video without a window, in parallel",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="Examples:\n"
+               "  python render_review.py annotations/match_coco.json videos/match.mp4\n"
+               "  python render_review.py annotations/match_coco.npy videos/match.mp4 -o review.mp4 --scale 0.5\n"
+               "  python render_review.py annotations/match_coco.json videos/match.mp4 "
+               "--detections detections/match.jsonl\n"
+               "  python render_review.py annotations/match_coco.json videos/match.mp4 --contact-sheet --every 90")
+    parser.add_argument('annotation_file', help="COCO .json or binary .npy")
+    parser.add_argument('video_path')
+    parser.add_argument('-o', '--output',
+                        help="review video, or directory of sheets with --contact-sheet "
+                             "(default: next to the annotations)")
+    parser.add_argument('--detections', metavar='PATH',
+                        help="also draw detector boxes (detector --stream JSONL or *_detections.json)")
+    parser.add_argument('--workers', type=int, default=None,
+                        help="render processes (default: all cores)")
+    parser.add_argument('--scale', type=float, default=1.0,
+                        help="output video size relative to the source (default: %(default)s)")
+    parser.add_argument('--contact-sheet', action='store_true',
+                        help="write pages of thumbnails instead of a video")
+    parser.add_argument('--every', type=int, default=DEFAULT_EVERY,
+                        help="contact sheet: one thumbnail every N frames (default: %(default)s)")
+    parser.add_argument('--cols', type=int, default=DEFAULT_COLS)
+    parser.add_argument('--rows', type=int, default=DEFAULT_ROWS)
+    parser.add_argument('--thumb-width', type=int, default=DEFAULT_THUMB_WIDTH)
+    args = parser.parse_args()
+
+    for path in (args.annotation_file, args.video_path, args.detections):
+        if path is not None and not os.path.exists(path):
+            print(f"✗ Not found: {path}")
+            sys.exit(1)
+
+    stem = os.path.splitext(args.annotation_file)[0]
+    output = args.output or (f"{stem}_sheets" if args.contact_sheet else f"{stem}_review.mp4")
+
+    summary = render_review(args.annotation_file, args.video_path, output, args.detections, args.workers,
+                            args.scale, args.contact_sheet, args.every, args.cols, args.rows,
+                            args.thumb_width)
+
+    if args.contact_sheet:
+        print(f"✓ {len(summary['pages'])} contact sheets ({summary['thumbnails']} thumbnails): {output}")
+    else:
+        print(f"✓ Review video: {output} ({summary['frames']} frames, joined with {summary['concat']})")
+    print(f"  {summary['wall_time']:.1f}s | {summary['realtime_factor']:.1f}x real time")
+
+
+if __name__ == "__main__":
+    main()
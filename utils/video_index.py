@@ -0,0 +1,257 @@
+#!/usr/bin/env python3
+"""Keyframe index and keyframe-aware frame seeking"""
+
+import argparse
+import bisect
+import json
+import os
+import random
+import subprocess
+import sys
+import zlib
+from pathlib import Path
+
+import cv2
+
+SEEK_AHEAD = 30  # without an index, forward gaps up to this are decoded through instead of seeking
+CHECK_RANDOM_SEEKS = 200  # --check: random targets on top of every keyframe and the frame before it
+INDEX_VERSION = 2  # cached indexes of another version are rebuilt
+
+
+def index_path(video_path):
+    return video_path + ".keyframes.json"
+
+
+def build_keyframe_index(video_path):
+    """Display-order indices of the keyframes of the first video stream and
+    the presentation time of every frame (seconds from the first frame, as
+    OpenCV reports CAP_PROP_POS_MSEC), from one ffprobe demux pass over the
+    packets (no decoding). None if ffprobe is unavailable or fails."""
+    try:
+        result = subprocess.run(
+            ['ffprobe', '-v', 'error', '-select_streams', 'v:0',
+             '-show_entries', 'packet=pts_time,dts_time,flags',
+             '-of', 'json', video_path],
+            capture_output=True,
+            text=True,
+            check=True
+        )
+        packets = json.loads(result.stdout).get('packets', [])
+    except (subprocess.CalledProcessError, FileNotFoundError, ValueError):
+        return None
+
+    def timestamp(packet):
+        value = packet.get('pts_time', packet.get('dts_time'))
+        return float(value) if value not in (None, 'N/A') else float('inf')
+
+    # Packets come in decode order; frame numbers follow presentation order
+    ordered = sorted(enumerate(packets), key=lambda item: (timestamp(item[1]), item[0]))
+    keyframes = [frame_idx for frame_idx, (_, packet) in enumerate(ordered)
+                 if 'K' in packet.get('flags', '')]
+    times = [timestamp(packet) for _, packet in ordered]
+    pts = [round(t - times[0], 6) for t in times] if times and times[-1] != float('inf') else None
+    return {'frames': len(packets), 'keyframes': keyframes, 'pts': pts}
+
+
+def load_keyframe_index(video_path, verbose=True):
+    """Keyframe index of `video_path`, built once and cached next to the video
+    as <video>.keyframes.json (rebuilt when the video's size or mtime change)."""
+    stat = os.stat(video_path)
+    signature = {'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns, 'version': INDEX_VERSION}
+    path = index_path(video_path)
+
+    if os.path.exists(path):
+        try:
+            with open(path, 'r') as f:
+                cached = json.load(f)
+            if cached.get('video') == signature:
+                return cached
+        except (OSError, ValueError):
+            pass
+
+    if verbose:
+        print("→ Indexing keyframes (once per video)...")
+    index = build_keyframe_index(video_path)
+    if index is None or not index['keyframes']:
+        if verbose:
+            print("⚠ No keyframe index (ffprobe not found?) - seeking without it")
+        return None
+
+    index['video'] = signature
+    try:
+        with open(path, 'w') as f:
+            json.dump(index, f)
+    except OSError as e:
+        if verbose:
+            print(f"⚠ Could not cache keyframe index: {e}")
+    return index
+
+
+class FrameSeeker:
+    """Tracks the position of a VideoCapture and seeks through the keyframe index.
+
+    seek(n) leaves the capture so that the next read() returns frame n: it
+    jumps to the last keyframe at or before n and decodes forward from there,
+    so a seek never decodes more than one GOP, wherever n is. When the capture
+    is already between that keyframe and n it just decodes forward.
+
+    OpenCV's CAP_PROP_POS_FRAMES jump is derived from timestamps and can land
+    off the requested frame (B-frames, variable frame rate, edit lists), so
+    with frame times in the index the first frame after a jump is identified
+    by its timestamp and the position corrected; a jump past the target falls
+    back to the keyframe before.
+    """
+
+    def __init__(self, cap, index=None):
+        self.cap = cap
+        self.index = index
+        self.keyframes = index['keyframes'] if index else None
+        self.frames = index['frames'] if index else None
+        self.pts = index.get('pts') if index else None
+        self.pos = 0
+        self._grabbed = False  # frame pos - 1 is grabbed but not yet retrieved
+
+    def keyframe_before(self, frame_idx):
+        if not self.keyframes:
+            return None
+        i = bisect.bisect_right(self.keyframes, frame_idx) - 1
+        return self.keyframes[i] if i >= 0 else 0
+
+    def max_gop(self):
+        """Most frames a seek can decode"""
+        if not self.keyframes:
+            return None
+        bounds = self.keyframes + [self.frames]
+        return max(b - a for a, b in zip(bounds, bounds[1:]))
+
+    def _frame_at(self, seconds):
+        """Frame whose presentation time is nearest to `seconds`"""
+        i = bisect.bisect_left(self.pts, seconds)
+        if i == len(self.pts) or (i > 0 and seconds - self.pts[i - 1] < self.pts[i] - seconds):
+            i -= 1
+        return i
+
+    def _jump(self, keyframe):
+        self.cap.set(cv2.CAP_PROP_POS_FRAMES, keyframe)
+        self.pos = keyframe
+        self._grabbed = False
+        if not self.pts:
+            return True
+        # Check where the jump landed by the timestamp of the frame there;
+        # that frame stays grabbed and is what the next read() returns
+        if not self.cap.grab():
+            return False
+        self.pos = self._frame_at(self.cap.get(cv2.CAP_PROP_POS_MSEC) / 1000)
+        self._grabbed = True
+        return True
+
+    def seek(self, frame_idx):
+        keyframe = self.keyframe_before(frame_idx)
+        if keyframe is None:
+            if not self.pos <= frame_idx <= self.pos + SEEK_AHEAD:
+                self.cap.set(cv2.CAP_PROP_POS_FRAMES, frame_idx)
+                self.pos = frame_idx
+                self._grabbed = False
+        elif not keyframe <= self.pos <= frame_idx:
+            i = bisect.bisect_right(self.keyframes, frame_idx) - 1
+            while True:
+                if not self._jump(self.keyframes[i] if i >= 0 else 0):
+                    return False
+                if self.pos <= frame_idx:
+                    break
+                if i < 0:
+                    return False
+                i -= 1
+
+        while self.pos < frame_idx:
+            if self._grabbed:
+                self._grabbed = False  # skip the frame grabbed by the jump
+            elif not self.cap.grab():
+                return False
+            self.pos += 1
+        return True
+
+    def read(self):
+        """Next frame (frame `pos`), then pos moves on"""
+        if self._grabbed:
+            self._grabbed = False
+            ret, frame = self.cap.retrieve()
+        else:
+            ret, frame = self.cap.read()
+        if ret:
+            self.pos += 1
+        return ret, frame
+
+
+def check_seeks(video_path, index, backfill=30, seed=0):
+    """Seek to every keyframe, the frame before each one and random frames,
+    both directly and through a FrameCache, and compare each frame with a
+    sequential decode. Returns a list of (target, how) that came back wrong."""
+    sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+    from utils.frame_cache import FrameCache
+
+    cap = cv2.VideoCapture(video_path)
+    expected = []
+    while True:
+        ret, frame = cap.read()
+        if not ret:
+            break
+        expected.append(zlib.crc32(frame))
+    cap.release()
+
+    rng = random.Random(seed)
+    targets = [t for k in index['keyframes'] for t in (k, k - 1) if 0 <= t < len(expected)]
+    targets += [rng.randrange(len(expected)) for _ in range(CHECK_RANDOM_SEEKS)]
+    rng.shuffle(targets)
+    targets.append(0)
+
+    failures = []
+    cap = cv2.VideoCapture(video_path)
+    seeker = FrameSeeker(cap, index)
+    for target in targets:
+        ok = seeker.seek(target)
+        ret, frame = seeker.read() if ok else (False, None)
+        if not ret or zlib.crc32(frame) != expected[target]:
+            failures.append((target, "seek"))
+
+    cache_seeker = FrameSeeker(cv2.VideoCapture(video_path), index)
+    cache = FrameCache(max_frames=backfill)
+    for target in targets:
+        frame = cache.read(cache_seeker, target, backfill)
+        if frame is None or zlib.crc32(frame) != expected[target]:
+            failures.append((target, "cache"))
+    cap.release()
+    cache_seeker.cap.release()
+    return failures
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Build (once) and inspect the keyframe index of a video",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="Examples:\n"
+               "  python video_index.py videos/match.mp4\n"
+               "  python video_index.py videos/match.mp4 --check")
+    parser.add_argument('video_path')
+    parser.add_argument('--check', action='store_true',
+                        help="verify that seeks return the right frames (decodes the whole video)")
+    args = parser.parse_args()
+
+    index = load_keyframe_index(args.video_path)
+    if index is None:
+        sys.exit(1)
+    seeker = FrameSeeker(None, index)
+    print(f"✓ {index['frames']} frames | {len(index['keyframes'])} keyframes | max GOP {seeker.max_gop()} frames")
+    print(f"  Cached: {index_path(args.video_path)}")
+
+    if args.check:
+        failures = check_seeks(args.video_path, index)
+        if failures:
+            print(f"✗ {len(failures)} seeks returned the wrong frame, e.g. "
+                  + ", ".join(f"{target} ({how})" for target, how in failures[:10]))
+            sys.exit(1)
+        print("✓ Seeks to keyframes, the frames before them and random frames return the right frame")
+
+
+if __name__ == "__main__":
+    main()
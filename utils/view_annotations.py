@@ -2,27 +2,71 @@
 """COCO annotations viewer"""
 
 import cv2
-import json
+import numpy as np
 import sys
 import os
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from utils.annotation_io import FLAG_INTERPOLATED, load_annotations
+from utils.annotation_stats import annotation_report
+from utils.frame_cache import FrameCache
+from utils.video_index import FrameSeeker, load_keyframe_index
+
+VIEWER_CACHE_MB = 256  # decoded frames kept for stepping back and forth
+VIEWER_BACKFILL = 15  # frames decoded ahead of a backward seek
+PAUSED_DELAY_MS = 30  # key polling interval while paused (nothing is redrawn)
+
+def frame_lookup(records):
+    """Records sorted by frame_id (a view when already sorted), for
+    searchsorted lookups"""
+    frame_ids = records['frame_id']
+    if len(frame_ids) > 1 and np.any(frame_ids[1:] < frame_ids[:-1]):
+        records = records[np.argsort(frame_ids, kind='stable')]
+    return records
+
+def annotations_at(records, frame_idx):
+    lo, hi = np.searchsorted(records['frame_id'], [frame_idx, frame_idx + 1])
+    return records[lo:hi]
+
+def draw_annotations(frame, frame_records, frame_idx, total_frames):
+    """Ball markers and the frame info line, drawn in place (shared with
+    render_review.py so rendered reviews look like the viewer)"""
+    for ann in frame_records:
+        cx, cy = int(ann['x']), int(ann['y'])
+        color = (0, 255, 255) if ann['flags'] & FLAG_INTERPOLATED else (0, 255, 0)
+
+        cv2.circle(frame, (cx, cy), 8, color, 2)
+        cv2.circle(frame, (cx, cy), 3, (0, 0, 255), -1)
+
+        cv2.putText(frame, f"Ball", (cx + 10, cy - 10),
+                   cv2.FONT_HERSHEY_SIMPLEX, 0.5, color, 2)
+
+    info_text = f"Frame: {frame_idx}/{total_frames}"
+    if len(frame_records):
+        info_text += f" - ANNOTATED"
+        color = (0, 255, 0)
+    else:
+        info_text += " - No annotation"
+        color = (200, 200, 200)
+
+    cv2.putText(frame, info_text, (10, 30),
+               cv2.FONT_HERSHEY_SIMPLEX, 0.7, color, 2)
+    return frame
 
 def visualize_annotations(annotation_file, video_file):
-    with open(annotation_file, 'r') as f:
-        coco_data = json.load(f)
+    records, meta = load_annotations(annotation_file)
+    coco_data = meta['coco']
 
     print(f"\n{'='*70}")
     print(f"COCO Annotation Viewer")
     print(f"{'='*70}")
     print(f"Video: {coco_data['info']['video_id']}")
-    print(f"Annotations: {len(coco_data['annotations'])}")
+    print(f"Annotations: {len(records)}")
     print(f"{'='*70}\n")
 
-    frame_annotations = {}
-    for ann in coco_data['annotations']:
-        frame_id = ann['frame_id']
-        if frame_id not in frame_annotations:
-            frame_annotations[frame_id] = []
-        frame_annotations[frame_id].append(ann)
+    records = frame_lookup(records)
 
     cap = cv2.VideoCapture(video_file)
     if not cap.isOpened():
@@ -31,50 +75,40 @@ def visualize_annotations(annotation_file, video_file):
 
     total_frames = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
     fps = int(cap.get(cv2.CAP_PROP_FPS))
+    seeker = FrameSeeker(cap, load_keyframe_index(video_file))
+    cache = FrameCache(VIEWER_CACHE_MB)
+    frame_bytes = int(cap.get(cv2.CAP_PROP_FRAME_WIDTH)) * int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT)) * 3
+    backfill = min(VIEWER_BACKFILL, cache.capacity(frame_bytes) // 2)
 
     frame_idx = 0
+    shown_idx = None  # frame currently on screen
     paused = False
 
     print("Controls: SPACE=play/pause | n=next | p=prev | q=quit\n")
 
     while True:
         if not paused:
-            ret, frame = cap.read()
+            if shown_idx is not None and seeker.pos != frame_idx + 1:
+                seeker.seek(frame_idx + 1)  # resume after stepping while paused
+            ret, decoded = seeker.read()
             if not ret:
                 print("✓ End")
                 break
-            frame_idx = int(cap.get(cv2.CAP_PROP_POS_FRAMES)) - 1
-        else:
-            cap.set(cv2.CAP_PROP_POS_FRAMES, frame_idx)
-            ret, frame = cap.read()
-            if not ret:
+            frame_idx = seeker.pos - 1
+            decoded = cache.put(frame_idx, decoded)
+        elif frame_idx != shown_idx:
+            decoded = cache.read(seeker, frame_idx, backfill)
+            if decoded is None:
                 break
 
-        if frame_idx in frame_annotations:
-            for ann in frame_annotations[frame_idx]:
-                center = ann['center']
-                cx, cy = int(center[0]), int(center[1])  # type: ignore
-
-                cv2.circle(frame, (cx, cy), 8, (0, 255, 0), 2)
-                cv2.circle(frame, (cx, cy), 3, (0, 0, 255), -1)
-
-                cv2.putText(frame, f"Ball", (cx + 10, cy - 10),
-                           cv2.FONT_HERSHEY_SIMPLEX, 0.5, (0, 255, 0), 2)
+        # Paused on the frame already shown: no decode or redraw, only key polling
+        if frame_idx != shown_idx:
+            frame = decoded.copy()  # cached frames are never drawn on
+            draw_annotations(frame, annotations_at(records, frame_idx), frame_idx, total_frames)
+            cv2.imshow('Viewer', frame)
+            shown_idx = frame_idx
 
-        info_text = f"Frame: {frame_idx}/{total_frames}"
-        if frame_idx in frame_annotations:
-            info_text += f" - ANNOTATED"
-            color = (0, 255, 0)
-        else:
-            info_text += " - No annotation"
-            color = (200, 200, 200)
-
-        cv2.putText(frame, info_text, (10, 30),
-                   cv2.FONT_HERSHEY_SIMPLEX, 0.7, color, 2)
-
-        cv2.imshow('Viewer', frame)
-
-        delay = 1 if paused else int(1000 / fps)
+        delay = PAUSED_DELAY_MS if paused else int(1000 / fps)
         key = cv2.waitKey(delay) & 0xFF
 
         if key == ord('q'):
@@ -90,12 +124,14 @@ def visualize_annotations(annotation_file, video_file):
 
     cap.release()
     cv2.destroyAllWindows()
-    print("\n✓ Closed")
+    stats = cache.stats()
+    print(f"\nFrame cache: {stats['frames']} frames | hit rate {stats['hit_rate']:.0%}")
+    print("✓ Closed")
 
 
 def print_statistics(annotation_file):
-    with open(annotation_file, 'r') as f:
-        coco_data = json.load(f)
+    records, meta = load_annotations(annotation_file)
+    coco_data = meta['coco']
 
     print(f"\n{'='*70}")
     print(f"ANNOTATION STATISTICS")
@@ -107,26 +143,31 @@ def print_statistics(annotation_file):
         print(f"Resolution: {video['width']}x{video['height']}")
         print(f"Frames: {video['total_frames']} | FPS: {video['fps']}")
 
-    print(f"\nAnnotations: {len(coco_data['annotations'])}")
-
-    if coco_data['annotations']:
-        frame_ids = [ann['frame_id'] for ann in coco_data['annotations']]
-        print(f"Frame range: {min(frame_ids)} - {max(frame_ids)}")
+    print(f"\nAnnotations: {len(records)}")
 
-        centers = [ann['center'] for ann in coco_data['annotations']]
-        avg_x = sum(c[0] for c in centers) / len(centers)  # type: ignore
-        avg_y = sum(c[1] for c in centers) / len(centers)  # type: ignore
+    if len(records):
+        video = coco_data.get('video', {})
+        report = annotation_report(records, video.get('fps') or 30, video.get('width'), video.get('height'))
+        print(f"Frame range: {report['first_frame']} - {report['last_frame']} | coverage {report['coverage']:.1%}")
+        print(f"Interpolated: {report['interpolated']} | Gaps: {report['gaps']['count']} "
+              f"({report['gaps']['missing_frames']} frames) | Segments: {report['segments']['count']}")
+        if report['speed_px_s']:
+            print(f"Speed p95: {report['speed_px_s']['p95']:.0f} px/s | "
+                  f"Outlier jumps: {report['jumps']['count']}")
 
+        avg_x, avg_y = report['mean_position']
         print(f"\nAvg position: X={avg_x:.1f}, Y={avg_y:.1f}")
+        print(f"Full report: python utils/annotation_stats.py {annotation_file}")
 
     print(f"{'='*70}\n")
 
 
 def main():
     if len(sys.argv) < 2:
-        print("Usage: python view_annotations.py <annotation.json> [video.mp4]")
+        print("Usage: python view_annotations.py <annotation.json|annotation.npy> [video.mp4]")
         print("\nExamples:")
         print("  python view_annotations.py annotations/match_coco.json")
+        print("  python view_annotations.py annotations/match_coco.npy")
         print("  python view_annotations.py annotations/match_coco.json videos/match.mp4")
         sys.exit(1)
 